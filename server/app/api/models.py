@@ -10,14 +10,28 @@ class MoveRequest(BaseModel):
     from_pos: PositionModel
     to_pos: PositionModel
     promotion_piece: Optional[str] = None  # "queen", "rook", etc.
+    game_id: Optional[str] = None  # defaults to the shared game
+    expected_version: Optional[int] = None  # reject the move if the game moved on
+
+class CreateGameRequest(BaseModel):
+    base_seconds: Optional[float] = None  # no clock when omitted
+    increment_seconds: float = 0.0
+
+class CreateGameResponse(BaseModel):
+    game_id: str
+    version: int
+    shard: int
 
 class GameStateResponse(BaseModel):
+    game_id: str
+    version: int
     board: List[List[Optional[dict]]]  # Serialized pieces
     current_turn: str
     status: str
     is_check: bool
     is_checkmate: bool
     is_stalemate: bool
+    clock: Optional[dict] = None
     
 class MoveResponse(BaseModel):
     success: bool
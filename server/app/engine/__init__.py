@@ -0,0 +1,15 @@
+from app.engine.search import (
+    Searcher, SearchLimits, SearchInfo, SearchLine, SearchStopped, MATE_SCORE
+)
+from app.engine.pool import SearchPool, SearchJob, run_search
+from app.engine.ponder import PonderScheduler
+from app.engine.cache import AnalysisCache
+from app.engine.mate import MateSolver, MateResult, solve_fen, solve_many
+from app.engine.match import EngineConfig, MatchResult, GameResult, run_match, play_game, sprt, elo_estimate
+
+__all__ = [
+    'Searcher', 'SearchLimits', 'SearchInfo', 'SearchLine', 'SearchStopped', 'MATE_SCORE',
+    'SearchPool', 'SearchJob', 'run_search', 'PonderScheduler', 'AnalysisCache',
+    'MateSolver', 'MateResult', 'solve_fen', 'solve_many',
+    'EngineConfig', 'MatchResult', 'GameResult', 'run_match', 'play_game', 'sprt', 'elo_estimate'
+]
@@ -0,0 +1,243 @@
+"""
+Request coalescing and result caching for searches.
+
+Requests are keyed by position (Zobrist hash) and MultiPV count. While a
+search for a key is running, identical requests wait for it instead of
+starting their own, and so do shallower ones. Finished results are kept
+in an LRU cache with a time to live, and a cached result answers any
+request for the same key that is no deeper than it.
+
+Every search also gets the movetime budget, so a deep request cannot hold
+a worker for minutes. A search that used up its budget before reaching
+the requested depth is cached as the answer for that depth, so repeating
+the request does not run the same capped search again.
+
+Streaming requests are coalesced the same way: one streaming search runs
+per key, and later subscribers first get the depths it has already
+finished. Either kind of search is stopped when its last waiter leaves.
+
+All methods must be called from the event loop thread.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from app.engine.pool import SearchJob, SearchPool
+from app.engine.search import SearchLimits
+from app.models.game import Game
+from app.models.zobrist import zobrist_hash
+
+_Key = Tuple[int, int]
+
+
+@dataclass
+class _Flight:
+    depth: int
+    future: "asyncio.Future[Optional[dict]]"  # the task running the search
+    waiters: int = 0
+
+
+@dataclass
+class _Stream:
+    depth: int
+    infos: List[dict] = field(default_factory=list)  # every depth finished so far
+    subscribers: int = 0
+    done: bool = False
+    error: Optional[BaseException] = None
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+    task: "Optional[asyncio.Task[None]]" = None
+
+
+class AnalysisCache:
+    """Single-flight front for a SearchPool with an LRU/TTL result cache"""
+
+    def __init__(
+        self,
+        pool: SearchPool,
+        max_entries: int = 4096,
+        ttl: float = 600.0,
+        movetime: Optional[float] = None,
+    ):
+        self.pool = pool
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.movetime = movetime  # seconds per search, None for depth only
+        self.hits = 0
+        self.coalesced = 0
+        self.searches = 0
+        # key -> (stored at, result, deepest request the result answers)
+        self._results: "OrderedDict[_Key, Tuple[float, dict, int]]" = OrderedDict()
+        self._flights: Dict[_Key, _Flight] = {}
+        self._streams: Dict[_Key, _Stream] = {}
+
+    @staticmethod
+    def key(game: Game, multipv: int) -> _Key:
+        return zobrist_hash(game), multipv
+
+    def peek(self, game: Game, depth: int, multipv: int = 1) -> Optional[dict]:
+        """Cached result at least depth deep, without searching"""
+        key = self.key(game, multipv)
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        stored_at, result, answers = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._results[key]
+            return None
+        if answers < depth:
+            return None
+        self._results.move_to_end(key)
+        return result
+
+    def limits(self, depth: int) -> SearchLimits:
+        return SearchLimits(depth=depth, movetime=self.movetime)
+
+    def store(self, game: Game, multipv: int, result: Optional[dict], answers: int = 0) -> None:
+        """
+        Remember a result unless a deeper one is already cached. answers is
+        the depth that was asked for, when the budget stopped the search short.
+        """
+        if result is None:
+            return
+        answers = max(answers, result["depth"])
+        key = self.key(game, multipv)
+        current = self._results.get(key)
+        if current is not None and current[2] > answers:
+            return
+        self._results[key] = (time.monotonic(), result, answers)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    async def analyze(self, game: Game, depth: int, multipv: int = 1) -> Optional[dict]:
+        """Search result for the position, shared with identical requests"""
+        cached = self.peek(game, depth, multipv)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        key = self.key(game, multipv)
+        flight = self._flights.get(key)
+        if flight is not None and flight.depth >= depth:
+            self.coalesced += 1
+        else:
+            self.searches += 1
+            task = asyncio.ensure_future(self._search(game, key, depth, multipv))
+            # Retrieve failures even if every caller gave up waiting
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            flight = self._flights[key] = _Flight(depth, task)
+        # Shielded so one caller giving up does not stop the shared search;
+        # the last one to give up does
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.future)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.future.done():
+                flight.future.cancel()
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+    async def _start(self, game: Game, depth: int, multipv: int, stream: bool = False) -> SearchJob:
+        """Start a search in the pool. If cancelled meanwhile, the job is stopped once it exists."""
+        starting = asyncio.ensure_future(
+            self.pool.start_async(game.to_fen(), self.limits(depth), multipv, stream)
+        )
+        try:
+            return await asyncio.shield(starting)
+        except asyncio.CancelledError:
+            starting.add_done_callback(lambda f: f.cancelled() or f.exception() or f.result().cancel())
+            raise
+
+    async def _search(self, game: Game, key: _Key, depth: int, multipv: int) -> Optional[dict]:
+        job: Optional[SearchJob] = None
+        try:
+            job = await self._start(game, depth, multipv)
+            result = await asyncio.wrap_future(job.future)
+            # Finished, either at full depth or out of time
+            self.store(game, multipv, result, answers=depth)
+            return result
+        except asyncio.CancelledError:
+            if job is not None:
+                job.cancel()
+            raise
+        finally:
+            flight = self._flights.get(key)
+            if flight is not None and flight.future is asyncio.current_task():
+                del self._flights[key]
+
+    async def stream(self, game: Game, depth: int, multipv: int = 1) -> AsyncIterator[dict]:
+        """
+        Every completed depth of a search of the position, shared with
+        identical streams. Close the iterator (e.g. with contextlib.aclosing)
+        when giving up early, so an unwatched search is stopped at once.
+        """
+        cached = self.peek(game, depth, multipv)
+        if cached is not None:
+            self.hits += 1
+            yield cached
+            return
+
+        key = self.key(game, multipv)
+        flight = self._streams.get(key)
+        if flight is not None and flight.depth >= depth:
+            self.coalesced += 1
+        else:
+            self.searches += 1
+            flight = self._streams[key] = _Stream(depth)
+            flight.task = asyncio.ensure_future(self._pump(game, key, multipv, flight))
+
+        flight.subscribers += 1
+        try:
+            sent = 0
+            while True:
+                while sent < len(flight.infos):
+                    info = flight.infos[sent]
+                    sent += 1
+                    yield info
+                    if info["depth"] >= depth:
+                        return
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.changed.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                flight.task.cancel()
+                # Later requests start afresh rather than join a stopping search
+                if self._streams.get(key) is flight:
+                    del self._streams[key]
+
+    async def _pump(self, game: Game, key: _Key, multipv: int, flight: _Stream) -> None:
+        """Run one streaming search and hand every depth to its subscribers"""
+        job: Optional[SearchJob] = None
+        try:
+            job = await self._start(game, flight.depth, multipv, stream=True)
+            async for info in job.stream():
+                flight.infos.append(info)
+                self.store(game, multipv, info)
+                self._notify(flight)
+            if flight.infos:
+                # Finished, either at full depth or out of time
+                self.store(game, multipv, flight.infos[-1], answers=flight.depth)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            flight.error = e
+        finally:
+            if job is not None:
+                job.cancel()
+            flight.done = True
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+            self._notify(flight)
+
+    @staticmethod
+    def _notify(flight: _Stream) -> None:
+        # Waiters hold the old event; new waiters get a fresh one
+        event, flight.changed = flight.changed, asyncio.Event()
+        event.set()
@@ -0,0 +1,333 @@
+"""
+Self-play matches between two engine configurations.
+
+Games are played in pairs from each opening, once with each engine as
+White, in worker processes. Each engine searches every move under a
+fixed depth, node or time budget. A game is a draw by threefold
+repetition or when it reaches the ply limit.
+
+Under depth and node budgets the engines are deterministic, so a pair
+played from the same position twice repeats the same two games, and
+counting the repeats would make the SPRT and error margins meaningless.
+Without random_plies a match therefore plays each opening once (at most
+2 * len(openings) games). With random_plies, every pair starts from the
+opening followed by that many random legal moves, drawn from a
+generator seeded with (seed, pair number), so openings can be cycled
+through and the match is still reproducible.
+
+Results from the test engine's point of view feed a sequential
+probability ratio test (SPRT) of H0: elo = elo0 against H1: elo = elo1.
+The match stops as soon as the log-likelihood ratio crosses one of the
+bounds set by alpha and beta, so clear results need few games.
+"""
+import importlib
+import math
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.engine.search import SearchLimits, Searcher
+from app.models.game import Game, GameStatus, Move
+from app.models.piece import Color
+from app.models.zobrist import zobrist_hash
+
+# Used when a node or time budget, not depth, is meant to stop the search
+_MAX_DEPTH = 64
+
+
+@dataclass
+class EngineConfig:
+    """One side of a match: search budget plus the searcher class to use"""
+    name: str
+    depth: Optional[int] = None
+    nodes: Optional[int] = None
+    movetime: Optional[float] = None  # seconds per move
+    tt_size: int = 1 << 16
+    searcher: str = "app.engine.search:Searcher"  # module:Class, e.g. a patched copy
+
+    def limits(self) -> SearchLimits:
+        depth = self.depth
+        if depth is None:
+            depth = _MAX_DEPTH if self.nodes or self.movetime else 3
+        return SearchLimits(depth=depth, nodes=self.nodes, movetime=self.movetime)
+
+    def searcher_class(self) -> Callable[..., Searcher]:
+        module, _, name = self.searcher.partition(":")
+        return getattr(importlib.import_module(module), name or "Searcher")
+
+
+@dataclass
+class SprtResult:
+    llr: float
+    lower: float
+    upper: float
+    decision: Optional[str]  # "H0", "H1" or None while undecided
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class GameResult:
+    opening: str
+    test_white: bool
+    score: float             # for the test engine: 1, 0.5 or 0
+    reason: str              # checkmate, stalemate, repetition or ply_limit
+    moves: List[str]
+    nodes: Dict[str, int]    # per engine name
+    time: Dict[str, float]   # seconds spent searching, per engine name
+
+
+@dataclass
+class MatchResult:
+    base: EngineConfig
+    test: EngineConfig
+    elo0: float
+    elo1: float
+    alpha: float
+    beta: float
+    games: List[GameResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def wins(self) -> int:
+        return sum(1 for game in self.games if game.score == 1)
+
+    @property
+    def draws(self) -> int:
+        return sum(1 for game in self.games if game.score == 0.5)
+
+    @property
+    def losses(self) -> int:
+        return sum(1 for game in self.games if game.score == 0)
+
+    def sprt(self) -> SprtResult:
+        return sprt(self.wins, self.draws, self.losses, self.elo0, self.elo1, self.alpha, self.beta)
+
+    def nps(self, name: str) -> int:
+        nodes = sum(game.nodes.get(name, 0) for game in self.games)
+        seconds = sum(game.time.get(name, 0.0) for game in self.games)
+        return int(nodes / seconds) if seconds > 0 else 0
+
+    def to_dict(self, include_games: bool = False) -> dict:
+        elo, margin = elo_estimate(self.wins, self.draws, self.losses)
+        result = {
+            "base": asdict(self.base),
+            "test": asdict(self.test),
+            "games": len(self.games),
+            "wins": self.wins,
+            "draws": self.draws,
+            "losses": self.losses,
+            "elo": elo,
+            "elo_error": margin,
+            "sprt": {"elo0": self.elo0, "elo1": self.elo1, "alpha": self.alpha, "beta": self.beta,
+                     **self.sprt().to_dict()},
+            "nps": {self.base.name: self.nps(self.base.name), self.test.name: self.nps(self.test.name)},
+            "elapsed_s": round(self.elapsed, 3),
+        }
+        if include_games:
+            result["game_log"] = [asdict(game) for game in self.games]
+        return result
+
+
+def expected_score(elo: float) -> float:
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def _score_stats(wins: float, draws: float, losses: float) -> Tuple[float, float, float]:
+    """Games played, mean score and per-game score variance"""
+    n = wins + draws + losses
+    if n == 0:
+        return 0, 0.5, 0.0
+    mean = (wins + draws / 2) / n
+    variance = (wins * (1 - mean) ** 2 + draws * (0.5 - mean) ** 2 + losses * mean ** 2) / n
+    return n, mean, variance
+
+
+def sprt(
+    wins: int, draws: int, losses: int,
+    elo0: float = 0.0, elo1: float = 5.0,
+    alpha: float = 0.05, beta: float = 0.05,
+) -> SprtResult:
+    """
+    SPRT on game scores, using the normal approximation to the
+    log-likelihood ratio of elo1 against elo0.
+    """
+    lower = math.log(beta / (1 - alpha))
+    upper = math.log((1 - beta) / alpha)
+    n, mean, _ = _score_stats(wins, draws, losses)
+    if n == 0:
+        return SprtResult(0.0, round(lower, 4), round(upper, 4), None)
+    # Half a game of each outcome keeps the variance away from zero in
+    # short, one-sided runs, which would otherwise end the test at once
+    _, _, variance = _score_stats(wins + 0.5, draws + 0.5, losses + 0.5)
+
+    s0, s1 = expected_score(elo0), expected_score(elo1)
+    llr = n * (s1 - s0) * (2 * mean - s0 - s1) / (2 * variance)
+    decision = "H1" if llr >= upper else "H0" if llr <= lower else None
+    return SprtResult(round(llr, 4), round(lower, 4), round(upper, 4), decision)
+
+
+def elo_estimate(wins: int, draws: int, losses: int) -> Tuple[Optional[float], Optional[float]]:
+    """Elo difference and its 95% error margin, None when not yet defined"""
+    n, mean, variance = _score_stats(wins, draws, losses)
+    if n == 0 or mean in (0.0, 1.0):
+        return None, None
+
+    def to_elo(score: float) -> float:
+        score = min(max(score, 1e-6), 1 - 1e-6)
+        return -400 * math.log10(1 / score - 1)
+
+    spread = 1.96 * math.sqrt(variance / n)
+    elo = to_elo(mean)
+    margin = (to_elo(mean + spread) - to_elo(mean - spread)) / 2
+    return round(elo, 2), round(margin, 2)
+
+
+def _best_move(config: EngineConfig, game: Game) -> Tuple[Move, int, float]:
+    """The move config plays, with the nodes and time it used"""
+    searcher = config.searcher_class()(game, tt_size=config.tt_size)
+    start = time.perf_counter()
+    info = searcher.search(config.limits())
+    spent = time.perf_counter() - start
+    if info is None or info.best_move is None:
+        # The budget ran out before depth 1 finished
+        move = game.get_all_legal_moves()[0]
+    else:
+        move = Move.from_uci(info.best_move)
+    return move, searcher.nodes, spent
+
+
+def play_game(opening: str, white: EngineConfig, black: EngineConfig, max_plies: int = 200) -> dict:
+    """
+    Play one game from a FEN. Returns White's score, why the game ended,
+    the moves, and the nodes and search time of each engine.
+    """
+    game = Game.from_fen(opening)
+    engines = {Color.WHITE: white, Color.BLACK: black}
+    nodes = {white.name: 0, black.name: 0}
+    spent = {white.name: 0.0, black.name: 0.0}
+    seen = Counter([zobrist_hash(game)])
+    moves = []
+
+    reason = "ply_limit"
+    while len(moves) < max_plies:
+        engine = engines[game.current_turn]
+        move, used, seconds = _best_move(engine, game)
+        nodes[engine.name] += used
+        spent[engine.name] += seconds
+        game.make_move(move.from_pos, move.to_pos, move.promotion_piece)
+        moves.append(move.uci())
+
+        if game.status != GameStatus.ACTIVE:
+            reason = game.status.value
+            break
+        key = zobrist_hash(game)
+        seen[key] += 1
+        if seen[key] >= 3:
+            reason = "repetition"
+            break
+
+    if game.status == GameStatus.CHECKMATE:
+        # The side to move has been mated
+        white_score = 0.0 if game.current_turn == Color.WHITE else 1.0
+    else:
+        white_score = 0.5
+    return {"white_score": white_score, "reason": reason, "moves": moves, "nodes": nodes, "time": spent}
+
+
+def random_opening(fen: str, plies: int, rng: random.Random) -> str:
+    """fen followed by plies random legal moves, avoiding finished games"""
+    for _ in range(100):
+        game = Game.from_fen(fen)
+        for _ in range(plies):
+            moves = game.get_all_legal_moves()
+            if not moves:
+                break
+            move = rng.choice(moves)
+            game.make_move(move.from_pos, move.to_pos, move.promotion_piece)
+        if game.status == GameStatus.ACTIVE:
+            return game.to_fen()
+    return fen
+
+
+def _play_job(job: Tuple[str, EngineConfig, EngineConfig, bool, int]) -> GameResult:
+    opening, base, test, test_white, max_plies = job
+    white, black = (test, base) if test_white else (base, test)
+    played = play_game(opening, white, black, max_plies)
+    score = played["white_score"] if test_white else 1 - played["white_score"]
+    return GameResult(opening, test_white, score, played["reason"], played["moves"],
+                      played["nodes"], played["time"])
+
+
+def run_match(
+    base: EngineConfig,
+    test: EngineConfig,
+    openings: Iterable[str],
+    max_games: int = 1000,
+    workers: Optional[int] = None,
+    max_plies: int = 200,
+    elo0: float = 0.0,
+    elo1: float = 5.0,
+    alpha: float = 0.05,
+    beta: float = 0.05,
+    random_plies: int = 0,
+    seed: int = 0,
+    on_game: Optional[Callable[[MatchResult, GameResult], None]] = None,
+) -> MatchResult:
+    """
+    Play game pairs until the SPRT reaches a decision or max_games have
+    been played. Without random_plies each opening is used for one pair
+    only; with it the openings are cycled through, randomised per pair.
+    """
+    if base.name == test.name:
+        raise ValueError("Engine configurations need different names")
+    openings = list(openings)
+    if not openings:
+        raise ValueError("No openings given")
+    if random_plies <= 0:
+        max_games = min(max_games, 2 * len(openings))
+
+    def jobs():
+        opening = None
+        for i in range(max_games):
+            pair = i // 2
+            if i % 2 == 0:
+                opening = openings[pair % len(openings)]
+                if random_plies > 0:
+                    opening = random_opening(opening, random_plies, random.Random(f"{seed}:{pair}"))
+            yield (opening, base, test, i % 2 == 1, max_plies)
+
+    result = MatchResult(base, test, elo0, elo1, alpha, beta)
+    start = time.perf_counter()
+    pending_jobs = jobs()
+    workers = workers or os.cpu_count() or 1
+    # Keep only a few games queued so an early stop wastes little work
+    queue_size = 2 * workers
+    with ProcessPoolExecutor(workers) as executor:
+        running = set()
+        for job in pending_jobs:
+            running.add(executor.submit(_play_job, job))
+            if len(running) >= queue_size:
+                break
+
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                game = future.result()
+                result.games.append(game)
+                if on_game is not None:
+                    on_game(result, game)
+            if result.sprt().decision is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+                break
+            for job in pending_jobs:
+                running.add(executor.submit(_play_job, job))
+                if len(running) >= queue_size:
+                    break
+    result.elapsed = time.perf_counter() - start
+    return result
@@ -0,0 +1,235 @@
+"""
+Mate-in-N solver using depth-first proof-number search (df-pn).
+
+The side to move is the attacker. A position is proven when every
+defence leads to mate within the remaining attacker moves, and disproven
+when some defence avoids it. Proof and disproof numbers are kept in a
+node store keyed by position and remaining depth; the store has a fixed
+capacity and forgets the least recently updated entries when full.
+
+solve() finds the shortest mate by proving mate in 1, 2, ... N in turn,
+so a "no_mate" result is a proof that no mate exists within N moves.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.models.game import Game, Move
+from app.models.zobrist import zobrist_hash
+
+INFINITY = 10 ** 9
+
+
+class NodeBudgetExceeded(Exception):
+    """Raised when a solve uses up its node budget"""
+
+
+@dataclass
+class MateResult:
+    fen: str
+    status: str              # "mate", "no_mate" or "unknown"
+    mate_in: Optional[int]   # attacker moves, when status is "mate"
+    line: List[str] = field(default_factory=list)  # UCI moves of the main line, may be cut short
+    nodes: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "fen": self.fen,
+            "status": self.status,
+            "mate_in": self.mate_in,
+            "line": self.line,
+            "nodes": self.nodes,
+        }
+
+
+class _NodeStore:
+    """Proof and disproof numbers, bounded in size"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._entries: Dict[Tuple[int, int], Tuple[int, int]] = {}
+
+    def get(self, key: Tuple[int, int]) -> Tuple[int, int]:
+        return self._entries.get(key, (1, 1))
+
+    def put(self, key: Tuple[int, int], pn: int, dn: int) -> None:
+        # Re-inserting keeps recently updated entries at the end
+        self._entries.pop(key, None)
+        self._entries[key] = (pn, dn)
+        if len(self._entries) > self.capacity:
+            for old_key in list(self._entries)[:self.capacity // 4]:
+                del self._entries[old_key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MateSolver:
+    """Proves or refutes forced mates from one position"""
+
+    def __init__(self, max_nodes: int = 200_000, store_capacity: int = 100_000):
+        self.max_nodes = max_nodes
+        self.store = _NodeStore(store_capacity)
+        self.nodes = 0
+
+    def solve(self, game: Game, max_moves: int) -> MateResult:
+        """Shortest forced mate for the side to move within max_moves moves"""
+        self.nodes = 0
+        fen = game.to_fen()
+        try:
+            mate_in = self._shortest(game, max_moves)
+        except NodeBudgetExceeded:
+            return MateResult(fen, "unknown", None, [], self.nodes)
+        if mate_in is None:
+            return MateResult(fen, "no_mate", None, [], self.nodes)
+
+        # The mate is proven. Building the line re-proves defences, so it
+        # gets a budget of its own and keeps what it found if that runs out.
+        proof_nodes = self.nodes
+        self.nodes = 0
+        line: List[str] = []
+        try:
+            self._main_line(game, mate_in, line)
+        except NodeBudgetExceeded:
+            pass
+        return MateResult(fen, "mate", mate_in, line, proof_nodes + self.nodes)
+
+    def _prove(self, game: Game, plies: int) -> bool:
+        self._mid(game, plies, True, INFINITY, INFINITY)
+        pn, _ = self.store.get((zobrist_hash(game), plies))
+        return pn == 0
+
+    def _play(self, game: Game, move: Move) -> Game:
+        child = game.copy()
+        child.apply_legal_move(move)
+        return child
+
+    def _expand(self, game: Game, plies: int, attacker: bool) -> Optional[Tuple[int, int]]:
+        """(pn, dn) if the node is decided without search, else None"""
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise NodeBudgetExceeded()
+        if attacker:
+            # The attacker ran out of moves without mating
+            return (INFINITY, 0) if plies <= 0 else None
+        if not game.get_all_legal_moves():
+            mated = game.board.is_in_check(game.current_turn)
+            return (0, INFINITY) if mated else (INFINITY, 0)
+        return (INFINITY, 0) if plies <= 0 else None
+
+    def _mid(self, game: Game, plies: int, attacker: bool, phi_limit: int, delta_limit: int) -> None:
+        """
+        Search until the node's phi or delta reaches its limit. phi/delta are
+        (pn, dn) at attacker nodes and (dn, pn) at defender nodes.
+        """
+        key = (zobrist_hash(game), plies)
+        decided = self._expand(game, plies, attacker)
+        if decided is not None:
+            self.store.put(key, *decided)
+            return
+
+        children = []
+        for move in game.get_all_legal_moves():
+            child = self._play(game, move)
+            children.append((child, (zobrist_hash(child), plies - 1)))
+
+        while True:
+            # Children are the opposite node type, so their delta is our phi
+            phi = INFINITY
+            delta = 0
+            best = second_delta = None
+            best_delta = INFINITY
+            for index, (child, child_key) in enumerate(children):
+                pn, dn = self.store.get(child_key)
+                child_phi, child_delta = (dn, pn) if attacker else (pn, dn)
+                delta = min(INFINITY, delta + child_phi)
+                if child_delta < best_delta or best is None:
+                    second_delta = best_delta if best is not None else INFINITY
+                    best, best_delta = index, child_delta
+                elif second_delta is None or child_delta < second_delta:
+                    second_delta = child_delta
+            phi = best_delta
+            if second_delta is None:
+                second_delta = INFINITY
+
+            if phi >= phi_limit or delta >= delta_limit:
+                pn, dn = (phi, delta) if attacker else (delta, phi)
+                self.store.put(key, pn, dn)
+                return
+
+            child, child_key = children[best]
+            pn, dn = self.store.get(child_key)
+            child_phi = dn if attacker else pn
+            self._mid(
+                child,
+                plies - 1,
+                not attacker,
+                min(INFINITY, delta_limit - delta + child_phi),
+                min(phi_limit, second_delta + 1),
+            )
+
+    def _shortest(self, game: Game, max_moves: int) -> Optional[int]:
+        for n in range(1, max_moves + 1):
+            if self._prove(game, 2 * n - 1):
+                return n
+        return None
+
+    def _main_line(self, game: Game, mate_in: int, line: List[str]) -> None:
+        """Append the line where the attacker plays the fastest mate and the defender resists longest"""
+        for remaining in range(mate_in, 0, -1):
+            best_move = None
+            for move in game.get_all_legal_moves():
+                child = self._play(game, move)
+                if remaining == 1:
+                    if child.get_all_legal_moves() or not child.board.is_in_check(child.current_turn):
+                        continue
+                elif not self._all_defences_lose(child, remaining - 1):
+                    continue
+                best_move = move
+                break
+            if best_move is None:
+                break
+            line.append(best_move.uci())
+            game = self._play(game, best_move)
+            if remaining == 1:
+                break
+
+            defences = game.get_all_legal_moves()
+            longest, defence = -1, None
+            for move in defences:
+                n = self._shortest(self._play(game, move), remaining - 1)
+                if n is not None and n > longest:
+                    longest, defence = n, move
+            if defence is None:
+                break
+            line.append(defence.uci())
+            game = self._play(game, defence)
+
+    def _all_defences_lose(self, game: Game, moves_left: int) -> bool:
+        """True if the defender to move is mated within moves_left attacker moves"""
+        plies = 2 * moves_left
+        self._mid(game, plies, False, INFINITY, INFINITY)
+        pn, _ = self.store.get((zobrist_hash(game), plies))
+        return pn == 0
+
+
+def solve_fen(fen: str, max_moves: int, max_nodes: int = 200_000) -> MateResult:
+    """Solve one position given as FEN"""
+    return MateSolver(max_nodes).solve(Game.from_fen(fen), max_moves)
+
+
+def _solve_job(args: Tuple[str, int, int]) -> dict:
+    fen, max_moves, max_nodes = args
+    return solve_fen(fen, max_moves, max_nodes).to_dict()
+
+
+def solve_many(
+    fens: Iterable[str],
+    max_moves: int,
+    max_nodes: int = 200_000,
+    workers: Optional[int] = None,
+) -> Iterable[dict]:
+    """Solve many positions in worker processes, yielding results in input order"""
+    jobs = ((fen, max_moves, max_nodes) for fen in fens)
+    with ProcessPoolExecutor(workers) as executor:
+        yield from executor.map(_solve_job, jobs, chunksize=4)
@@ -0,0 +1,115 @@
+"""
+Pondering: searching the position we expect after the opponent's reply
+while they are still thinking.
+
+After the engine moves, the second move of its principal variation is the
+predicted reply. The scheduler starts a search of the position after that
+reply. When the real reply arrives it either matches, and the running or
+finished search is handed to the next engine move, or it does not, and
+the search is stopped straight away.
+
+Ponder searches are background jobs of the pool: they never take the last
+idle worker and are stopped when foreground searches need their worker.
+They are also limited globally by the number allowed to run at once (always
+below the pool size) and per game by the time budget in the ponder limits.
+A finished ponder that no engine move picked up is dropped after
+keep_seconds.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from app.engine.pool import SearchPool, SearchJob
+from app.engine.search import SearchLimits
+
+
+@dataclass
+class _Ponder:
+    fen: str
+    job: SearchJob
+    finished_at: Optional[float] = None
+
+
+class PonderScheduler:
+    """Tracks at most one ponder search per game"""
+
+    def __init__(self, pool: SearchPool, limits: SearchLimits, max_active: int = 1, keep_seconds: float = 60.0):
+        self.pool = pool
+        self.limits = limits
+        # At least one worker always stays free for foreground searches
+        self.max_active = max(0, min(max_active, pool.size - 1))
+        self.keep_seconds = keep_seconds
+        self.hits = 0
+        self.misses = 0
+        self._ponders: Dict[str, _Ponder] = {}
+        # Moves are handled in threadpool workers, engine moves on the event loop
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_active > 0
+
+    def active_count(self) -> int:
+        with self._lock:
+            return sum(1 for ponder in self._ponders.values() if not ponder.job.done())
+
+    def start(self, game_id: str, predicted_fen: str) -> bool:
+        """
+        Ponder on predicted_fen for a game. Returns False when the global
+        budget is used up, in which case nothing is started.
+        """
+        self.cancel(game_id)
+        with self._lock:
+            self._prune()
+            running = sum(1 for ponder in self._ponders.values() if not ponder.job.done())
+            if running >= self.max_active:
+                return False
+            job = self.pool.start_background(predicted_fen, self.limits)
+            if job is None:
+                return False
+            ponder = self._ponders[game_id] = _Ponder(predicted_fen, job)
+        job.future.add_done_callback(lambda _: setattr(ponder, "finished_at", time.monotonic()))
+        return True
+
+    def _prune(self) -> None:
+        """Forget finished ponders that were not picked up in time. Needs the lock."""
+        cutoff = time.monotonic() - self.keep_seconds
+        stale = [game_id for game_id, ponder in self._ponders.items()
+                 if ponder.finished_at is not None and ponder.finished_at < cutoff]
+        for game_id in stale:
+            del self._ponders[game_id]
+
+    def resolve(self, game_id: str, fen: str) -> bool:
+        """
+        Called once the opponent has moved. Keeps the search if it was for
+        this position and stops it otherwise. Returns True on a hit.
+        """
+        with self._lock:
+            self._prune()
+            ponder = self._ponders.get(game_id)
+            if ponder is None:
+                return False
+            if ponder.fen == fen:
+                self.hits += 1
+                return True
+            del self._ponders[game_id]
+            self.misses += 1
+        ponder.job.cancel()
+        return False
+
+    def take(self, game_id: str, fen: str) -> Optional[SearchJob]:
+        """Hand over the search for fen, if this game was pondering on it"""
+        with self._lock:
+            ponder = self._ponders.get(game_id)
+            if ponder is None or ponder.fen != fen:
+                return None
+            del self._ponders[game_id]
+        return ponder.job
+
+    def cancel(self, game_id: str) -> None:
+        """Stop and forget any ponder search for a game"""
+        with self._lock:
+            ponder = self._ponders.pop(game_id, None)
+        if ponder is not None:
+            ponder.job.cancel()
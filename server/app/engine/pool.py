@@ -0,0 +1,164 @@
+"""
+Runs searches in worker processes so they never compete with request
+handling for the event loop or the GIL.
+
+Positions are sent to the workers as FEN. Streaming searches report every
+completed depth through a queue, and every search can be stopped through
+a shared event which the searcher polls as it goes.
+
+Background searches (pondering) only start while they leave a worker
+idle, and are stopped as soon as a foreground search would otherwise
+have to wait for a worker.
+"""
+import asyncio
+import multiprocessing
+import os
+import queue as queue_module
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import AsyncIterator, List, Optional, Set
+
+from app.engine.search import Searcher, SearchLimits
+from app.models.game import Game
+
+
+def run_search(fen: str, limits: SearchLimits, multipv: int = 1, updates=None, stop=None) -> Optional[dict]:
+    """Search a position and return the deepest result as a dict. Runs in a worker process."""
+    searcher = Searcher(Game.from_fen(fen), stop=stop)
+    result = None
+    try:
+        for info in searcher.iterate(limits, multipv):
+            result = info.to_dict()
+            if updates is not None:
+                updates.put(result)
+    finally:
+        if updates is not None:
+            updates.put(None)
+    return result
+
+
+class SearchJob:
+    """Handle on a search running in the pool"""
+
+    def __init__(self, future: Future, stop, updates=None):
+        self.future = future
+        self._stop = stop
+        self._updates = updates
+
+    def cancel(self) -> None:
+        """Ask the search to stop as soon as possible"""
+        self._stop.set()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    async def result(self) -> Optional[dict]:
+        """Deepest completed iteration, or None if not even depth 1 finished"""
+        return await asyncio.wrap_future(self.future)
+
+    async def stream(self, poll_interval: float = 0.1) -> AsyncIterator[dict]:
+        """Yield every completed depth until the search finishes"""
+        if self._updates is None:
+            raise RuntimeError("Search was not started with stream=True")
+        while True:
+            # Non-blocking reads, so an open stream only holds a thread for
+            # one manager round trip rather than for the whole poll interval
+            try:
+                update = await asyncio.to_thread(self._updates.get_nowait)
+            except queue_module.Empty:
+                if self.future.done():
+                    # Worker died without sending the end marker
+                    self.future.result()
+                    return
+                await asyncio.sleep(poll_interval)
+                continue
+            if update is None:
+                return
+            yield update
+
+
+class SearchPool:
+    """
+    A pool of search worker processes. Call ensure_started() at startup so
+    spawning the workers is not left to the first request.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers
+        self.size = workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        # Jobs submitted and not finished, and which of them are background
+        # jobs, oldest first. Preempted jobs are still running until they stop.
+        self._lock = threading.Lock()
+        self._active: Set[SearchJob] = set()
+        self._background: List[SearchJob] = []
+        self._preempted: Set[SearchJob] = set()
+
+    def ensure_started(self) -> None:
+        if self._executor is None:
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=context)
+            self._manager = context.Manager()
+
+    def start(self, fen: str, limits: SearchLimits, multipv: int = 1, stream: bool = False) -> SearchJob:
+        """Submit a search of the given position. Blocks on the manager process."""
+        self.ensure_started()
+        self._make_room()
+        return self._submit(fen, limits, multipv, stream, background=False)
+
+    def start_background(self, fen: str, limits: SearchLimits) -> Optional[SearchJob]:
+        """
+        Submit a search that gives way to foreground work. Returns None
+        without starting it unless a worker would still be left idle.
+        """
+        self.ensure_started()
+        with self._lock:
+            if self._busy() >= self.size - 1:
+                return None
+        return self._submit(fen, limits, 1, False, background=True)
+
+    def _submit(self, fen: str, limits: SearchLimits, multipv: int, stream: bool, background: bool) -> SearchJob:
+        stop = self._manager.Event()
+        updates = self._manager.Queue() if stream else None
+        future = self._executor.submit(run_search, fen, limits, multipv, updates, stop)
+        job = SearchJob(future, stop, updates)
+        with self._lock:
+            self._active.add(job)
+            if background:
+                self._background.append(job)
+        future.add_done_callback(lambda _: self._finished(job))
+        return job
+
+    def _busy(self) -> int:
+        return len(self._active) - len(self._preempted)
+
+    def _finished(self, job: SearchJob) -> None:
+        with self._lock:
+            self._active.discard(job)
+            self._preempted.discard(job)
+            if job in self._background:
+                self._background.remove(job)
+
+    def _make_room(self) -> None:
+        """Stop background searches until a new foreground search gets a worker"""
+        with self._lock:
+            victims = []
+            while self._busy() >= self.size and self._background:
+                job = self._background.pop(0)
+                self._preempted.add(job)
+                victims.append(job)
+        for job in victims:
+            job.future.cancel()
+            job.cancel()
+
+    async def start_async(self, fen: str, limits: SearchLimits, multipv: int = 1, stream: bool = False) -> SearchJob:
+        """start() from the event loop, with the manager round trips in a thread"""
+        return await asyncio.to_thread(self.start, fen, limits, multipv, stream)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+            self._executor = None
+            self._manager = None
@@ -0,0 +1,239 @@
+"""
+Iterative deepening alpha-beta search on top of Game move generation.
+
+Scores are in centipawns from the side to move's point of view and come
+from Board.evaluate at the leaves. The search can be interrupted through
+a stop event (anything with is_set()), a node budget or a time budget;
+iterate() then stops after the last completed depth.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.models.board import PIECE_VALUES
+from app.models.game import Game, Move
+from app.models.zobrist import zobrist_hash
+
+MATE_SCORE = 100_000
+# Scores beyond this are mates; the distance to mate is MATE_SCORE - |score| plies
+MATE_THRESHOLD = MATE_SCORE - 1_000
+
+_EXACT, _LOWER, _UPPER = 0, 1, 2
+_CHECK_EVERY = 64
+
+
+def _score_to_tt(score: int, ply: int) -> int:
+    """Mate scores count plies from the root; the TT stores them from the node"""
+    if score >= MATE_THRESHOLD:
+        return score + ply
+    if score <= -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score: int, ply: int) -> int:
+    if score >= MATE_THRESHOLD:
+        return score - ply
+    if score <= -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+class SearchStopped(Exception):
+    """Raised inside the search when it has to give up"""
+
+
+@dataclass
+class SearchLimits:
+    """When to stop searching. Depth is always required; the others are optional."""
+    depth: int = 3
+    nodes: Optional[int] = None
+    movetime: Optional[float] = None  # seconds
+
+
+@dataclass
+class SearchLine:
+    """One principal variation and its score"""
+    score: int
+    pv: List[str]
+
+    @property
+    def mate(self) -> Optional[int]:
+        """Moves until mate, negative when the side to move is getting mated"""
+        if abs(self.score) < MATE_THRESHOLD:
+            return None
+        plies = MATE_SCORE - abs(self.score)
+        moves = (plies + 1) // 2
+        return moves if self.score > 0 else -moves
+
+    def to_dict(self) -> dict:
+        mate = self.mate
+        score = {"mate": mate} if mate is not None else {"cp": self.score}
+        return {"score": score, "pv": self.pv}
+
+
+@dataclass
+class SearchInfo:
+    """Result of one completed iteration"""
+    depth: int
+    nodes: int
+    time: float
+    lines: List[SearchLine] = field(default_factory=list)
+
+    @property
+    def nps(self) -> int:
+        return int(self.nodes / self.time) if self.time > 0 else 0
+
+    @property
+    def best_move(self) -> Optional[str]:
+        return self.lines[0].pv[0] if self.lines and self.lines[0].pv else None
+
+    def to_dict(self) -> dict:
+        return {
+            "depth": self.depth,
+            "nodes": self.nodes,
+            "nps": self.nps,
+            "time_ms": int(self.time * 1000),
+            "lines": [
+                dict(multipv=i + 1, **line.to_dict())
+                for i, line in enumerate(self.lines)
+            ],
+        }
+
+
+class Searcher:
+    """Searches one position. Not thread safe; use one Searcher per search."""
+
+    def __init__(self, game: Game, stop=None, tt_size: int = 1 << 16):
+        self.game = game
+        self.stop = stop
+        self.tt_size = tt_size
+        self.nodes = 0
+        # zobrist key -> (depth, score, bound, best move uci)
+        self._tt: Dict[int, Tuple[int, int, int, Optional[str]]] = {}
+        self._limits = SearchLimits()
+        self._deadline: Optional[float] = None
+
+    def search(self, limits: SearchLimits, multipv: int = 1) -> Optional[SearchInfo]:
+        """Run to the limits and return the deepest completed iteration"""
+        info = None
+        for info in self.iterate(limits, multipv):
+            pass
+        return info
+
+    def iterate(self, limits: SearchLimits, multipv: int = 1) -> Iterator[SearchInfo]:
+        """Yield a SearchInfo after every completed depth"""
+        self._limits = limits
+        self.nodes = 0
+        start = time.perf_counter()
+        self._deadline = start + limits.movetime if limits.movetime else None
+
+        root_moves = self.game.get_all_legal_moves()
+        if not root_moves:
+            return
+        # Best lines from the previous iteration are searched first
+        order = {move.uci(): i for i, move in enumerate(self._order_moves(self.game, root_moves, None))}
+
+        for depth in range(1, limits.depth + 1):
+            try:
+                lines = self._search_root(depth, root_moves, order, multipv)
+            except SearchStopped:
+                return
+            yield SearchInfo(depth, self.nodes, time.perf_counter() - start, lines[:multipv])
+            order = {line.pv[0]: i for i, line in enumerate(lines)}
+            if abs(lines[0].score) >= MATE_THRESHOLD and len(root_moves) <= multipv:
+                return
+
+    def _search_root(self, depth: int, root_moves: List[Move], order: Dict[str, int], multipv: int) -> List[SearchLine]:
+        moves = sorted(root_moves, key=lambda m: order.get(m.uci(), len(order)))
+        lines: List[SearchLine] = []
+        for move in moves:
+            # Only moves that can still reach the top multipv need an exact score
+            alpha = -MATE_SCORE - 1
+            if len(lines) >= multipv:
+                alpha = sorted((line.score for line in lines), reverse=True)[multipv - 1]
+            child = self._play(self.game, move)
+            pv: List[str] = []
+            score = -self._negamax(child, depth - 1, -MATE_SCORE - 1, -alpha, 1, pv)
+            lines.append(SearchLine(score, [move.uci()] + pv))
+        lines.sort(key=lambda line: line.score, reverse=True)
+        return lines
+
+    def _negamax(self, game: Game, depth: int, alpha: int, beta: int, ply: int, pv: List[str]) -> int:
+        self._tick()
+        if depth == 0:
+            return game.board.evaluate(game.current_turn)
+
+        key = zobrist_hash(game)
+        entry = self._tt.get(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, entry_score, bound, tt_move = entry
+            entry_score = _score_from_tt(entry_score, ply)
+            # Bound cutoffs only, so PV nodes keep their full line
+            if entry_depth >= depth:
+                if bound == _LOWER and entry_score >= beta:
+                    return entry_score
+                if bound == _UPPER and entry_score <= alpha:
+                    return entry_score
+
+        moves = game.get_all_legal_moves()
+        if not moves:
+            if game.board.is_in_check(game.current_turn):
+                return -MATE_SCORE + ply
+            return 0
+
+        original_alpha = alpha
+        best_score = -MATE_SCORE - 1
+        best_move = None
+        for move in self._order_moves(game, moves, tt_move):
+            child_pv: List[str] = []
+            score = -self._negamax(self._play(game, move), depth - 1, -beta, -alpha, ply + 1, child_pv)
+            if score > best_score:
+                best_score = score
+                best_move = move.uci()
+            if score > alpha:
+                alpha = score
+                pv[:] = [move.uci()] + child_pv
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            bound = _UPPER
+        elif best_score >= beta:
+            bound = _LOWER
+        else:
+            bound = _EXACT
+        if len(self._tt) >= self.tt_size:
+            self._tt.clear()
+        self._tt[key] = (depth, _score_to_tt(best_score, ply), bound, best_move)
+        return best_score
+
+    def _order_moves(self, game: Game, moves: List[Move], tt_move: Optional[str]) -> List[Move]:
+        """Hash move first, then captures of the most valuable pieces, then promotions"""
+        def key(move: Move) -> int:
+            if tt_move is not None and move.uci() == tt_move:
+                return -100_000
+            captured = game.board.get_piece(move.to_pos)
+            value = PIECE_VALUES[captured.piece_type] if captured else 0
+            if move.promotion_piece:
+                value += PIECE_VALUES[move.promotion_piece]
+            return -value
+        return sorted(moves, key=key)
+
+    @staticmethod
+    def _play(game: Game, move: Move) -> Game:
+        child = game.copy()
+        child.apply_legal_move(move)
+        return child
+
+    def _tick(self) -> None:
+        self.nodes += 1
+        if self.nodes % _CHECK_EVERY:
+            return
+        if self.stop is not None and self.stop.is_set():
+            raise SearchStopped()
+        if self._limits.nodes is not None and self.nodes >= self._limits.nodes:
+            raise SearchStopped()
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchStopped()
@@ -1,16 +1,68 @@
+import os
+import json
+import time
+import asyncio
 import logging
-from fastapi import FastAPI, HTTPException
+from contextlib import aclosing, asynccontextmanager
+from typing import Optional, Set
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.models import MoveRequest
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.api.models import MoveRequest, CreateGameRequest, CreateGameResponse, GameStateResponse
 from app.models.position import Position
 from app.models.piece import (Piece, PieceType)
-from app.models.game import Game
+from app.models.game import Game, GameStatus, Move
 from app.models.board import Board
+from app.models.clock import GameClock
+from app.engine import SearchPool, SearchLimits, PonderScheduler, AnalysisCache
+from app.models.zobrist import zobrist_hash
+from app.services import BroadcastRegistry, EncodedStateCache, TimerWheel, etag_matches
+from app.storage import (
+    create_store_from_env, affinity_shard, GameNotFoundError, VersionConflictError, GameRecord
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("chess")
 
-app = FastAPI(title="Chess Backend")
+# Analysis searches run in worker processes so they never hold up /move
+search_pool = SearchPool(int(os.environ.get("CHESS_SEARCH_WORKERS", "2")))
+# Depth 6 can take this engine minutes, so analysis also has a time budget
+MAX_ANALYSIS_DEPTH = int(os.environ.get("CHESS_MAX_ANALYSIS_DEPTH", "4"))
+ANALYSIS_SECONDS = float(os.environ.get("CHESS_ANALYSIS_SECONDS", "5"))
+ENGINE_LIMITS = SearchLimits(depth=int(os.environ.get("CHESS_ENGINE_DEPTH", "3")))
+
+# Identical searches share one run and finished results are reused
+analysis_cache = AnalysisCache(
+    search_pool,
+    max_entries=int(os.environ.get("CHESS_ANALYSIS_CACHE_ENTRIES", "4096")),
+    ttl=float(os.environ.get("CHESS_ANALYSIS_CACHE_SECONDS", "600")),
+    movetime=ANALYSIS_SECONDS or None,
+)
+
+# Optional pondering on the predicted reply while the opponent thinks.
+# CHESS_PONDER_SLOTS caps ponder searches across all games (0 disables it;
+# at most CHESS_SEARCH_WORKERS - 1, so foreground searches always get a worker),
+# CHESS_PONDER_SECONDS caps the time spent pondering for any one game.
+ponderer = PonderScheduler(
+    search_pool,
+    SearchLimits(
+        depth=ENGINE_LIMITS.depth,
+        movetime=float(os.environ.get("CHESS_PONDER_SECONDS", "10")),
+    ),
+    max_active=int(os.environ.get("CHESS_PONDER_SLOTS", "0")),
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Spawning the workers and the manager process blocks, so do it now
+    await run_in_threadpool(search_pool.ensure_started)
+    timer_task = asyncio.create_task(timers.run())
+    yield
+    timer_task.cancel()
+    search_pool.shutdown()
+
+app = FastAPI(title="Chess Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,7 +72,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-game = Game()
+# Games live in a store so that several uvicorn workers can serve them.
+# Requests without a game id play the shared default game.
+store = create_store_from_env()
+DEFAULT_GAME_ID = "default"
+SHARD_COUNT = int(os.environ.get("CHESS_SHARDS", "1"))
+
+# Spectators only see moves made in their own worker, so watched games
+# should be routed by game id like moves are
+spectators = BroadcastRegistry(
+    max_queue=int(os.environ.get("CHESS_SPECTATOR_QUEUE", "8")),
+    stall_timeout=float(os.environ.get("CHESS_SPECTATOR_STALL_SECONDS", "10")),
+)
+SPECTATOR_SEND_TIMEOUT = float(os.environ.get("CHESS_SPECTATOR_SEND_TIMEOUT", "10"))
+
+# Encoded GET /games/{id} bodies, so unchanged polls skip serialization
+state_cache = EncodedStateCache(int(os.environ.get("CHESS_STATE_CACHE_GAMES", "10000")))
+
+# One timer per game with a running clock, all driven by a single task
+timers = TimerWheel(tick=float(os.environ.get("CHESS_TIMER_TICK_SECONDS", "0.1")))
 
 def serialize_board(board: Board):
     """Convert board to JSON-serializable format"""
@@ -41,6 +111,78 @@ def serialize_board(board: Board):
         board_data.append(row_data)
     return board_data
 
+def spectator_frame(record: GameRecord) -> bytes:
+    """Full game state for spectators, as UTF-8 JSON"""
+    game = record.game
+    last_move = game.last_move
+    return json.dumps({
+        "type": "state",
+        "game_id": record.game_id,
+        "version": record.version,
+        "board": serialize_board(game.board),
+        "current_turn": game.current_turn.value,
+        "status": game.status.value,
+        "last_move": last_move.uci() if last_move else None,
+        "clock": game.clock.to_dict() if game.clock else None,
+    }).encode()
+
+def _game_changed(record: GameRecord, from_thread: bool) -> None:
+    """Tell spectators about a new version and re-arm the game's flag timer"""
+    game = record.game
+    if spectators.is_watched(record.game_id):
+        frame = spectator_frame(record)
+        if from_thread:
+            spectators.publish_threadsafe(record.game_id, record.version, frame)
+        else:
+            spectators.publish(record.game_id, record.version, frame)
+
+    deadline = game.clock.deadline() if game.clock else None
+    if deadline is not None and game.status == GameStatus.ACTIVE:
+        if from_thread:
+            timers.schedule_threadsafe(record.game_id, deadline, _on_flag)
+        else:
+            timers.schedule(record.game_id, deadline, _on_flag)
+    elif game.clock is not None:
+        if from_thread:
+            timers.cancel_threadsafe(record.game_id)
+        else:
+            timers.cancel(record.game_id)
+
+# Flag checks in progress; the loop only keeps weak references to tasks
+_flag_tasks: Set["asyncio.Task[None]"] = set()
+
+def _on_flag(game_id: str) -> None:
+    task = asyncio.create_task(_handle_flag(game_id))
+    _flag_tasks.add(task)
+    task.add_done_callback(_flag_tasks.discard)
+
+async def _handle_flag(game_id: str) -> None:
+    try:
+        flagged, record = await run_in_threadpool(store.update, game_id, lambda game: game.check_timeout())
+    except GameNotFoundError:
+        return
+    except Exception:
+        # e.g. a locked SQLite database; try again so the flag still falls
+        logger.exception("Could not check clock of %s, retrying", game_id)
+        timers.schedule(game_id, time.time() + timers.tick, _on_flag)
+        return
+    if flagged:
+        logger.info("Game %s: %s lost on time", game_id, record.game.current_turn.value)
+    # Re-arms the timer if a move in another worker moved the deadline
+    _game_changed(record, from_thread=False)
+
+def _move_mutation(from_pos: Position, to_pos: Position, promotion: Optional[PieceType]):
+    """Store update that plays a move, or records a flag fall instead"""
+    def play(game: Game) -> bool:
+        if game.check_timeout():
+            return True
+        # display() runs a check test, so skip it unless it will be logged
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Board BEFORE move:")
+            logger.info("\n" + game.display())
+        return game.make_move(from_pos, to_pos, promotion)
+    return play
+
 @app.get("/")
 def root():
     return {"message": "Chess Backend API"}
@@ -51,12 +193,69 @@ def read_board():
     data = serialize_board(board)
     return {"board_data": data}
 
+@app.post("/games", response_model=CreateGameResponse)
+def create_game(req: Optional[CreateGameRequest] = None):
+    clock = None
+    if req is not None and req.base_seconds is not None:
+        if req.base_seconds <= 0 or req.increment_seconds < 0:
+            raise HTTPException(status_code=400, detail="Invalid time control")
+        clock = GameClock(req.base_seconds, req.increment_seconds)
+    record = store.create(Game(clock=clock))
+    return {
+        "game_id": record.game_id,
+        "version": record.version,
+        "shard": affinity_shard(record.game_id, SHARD_COUNT),
+    }
+
+@app.get("/games/{game_id}", response_model=GameStateResponse)
+def read_game(game_id: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Current state of a game. The ETag changes with every move, so polling
+    clients should send If-None-Match and get 304 while nothing changed.
+    """
+    try:
+        record = store.get(game_id)
+    except GameNotFoundError:
+        raise HTTPException(status_code=404, detail="Game not found")
+
+    cached = state_cache.get(game_id, record.version)
+    if cached is None:
+        game = record.game
+        etag = f'"{record.version}-{zobrist_hash(game):016x}"'
+        body = json.dumps({
+            "game_id": record.game_id,
+            "version": record.version,
+            "board": serialize_board(game.board),
+            "current_turn": game.current_turn.value,
+            "status": game.status.value,
+            "is_check": game.is_check(),
+            "is_checkmate": game.is_checkmate(),
+            "is_stalemate": game.is_stalemate(),
+            "clock": game.clock.to_dict() if game.clock else None,
+        }).encode()
+        state_cache.put(game_id, record.version, etag, body)
+    else:
+        etag, body = cached
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.post("/move")
 def make_move(req: MoveRequest):
-    logger.info("Received move: %s -> %s", req.from_pos, req.to_pos)
-    logger.info("Board BEFORE move:")
-    logger.info("\n" + game.display())
-    
+    return _play_move(req.game_id or DEFAULT_GAME_ID, req)
+
+@app.post("/games/{game_id}/move")
+def make_game_move(game_id: str, req: MoveRequest):
+    # Same as /move, with the id in the path so a proxy can route on it
+    return _play_move(game_id, req)
+
+def _play_move(game_id: str, req: MoveRequest):
+    logger.info("Received move for %s: %s -> %s", game_id, req.from_pos, req.to_pos)
+
+    if game_id == DEFAULT_GAME_ID:
+        store.get_or_create(game_id)
 
     from_pos = Position(req.from_pos.row, req.from_pos.col)
     to_pos = Position(req.to_pos.row, req.to_pos.col)
@@ -68,22 +267,200 @@ def make_move(req: MoveRequest):
         except ValueError:
             logger.error("Invalid promotion piece: %s", req.promotion_piece)
             raise HTTPException(status_code=400, detail="Invalid promotion piece")
-        
-    success = game.make_move(from_pos, to_pos, promotion)
 
+    try:
+        success, record = store.update(
+            game_id, _move_mutation(from_pos, to_pos, promotion), req.expected_version
+        )
+    except GameNotFoundError:
+        raise HTTPException(status_code=404, detail="Game not found")
+    except VersionConflictError as e:
+        logger.warning("Stale move for %s: %s", game_id, e)
+        raise HTTPException(status_code=409, detail="Game has changed")
+
+    if record.game.is_timeout():
+        if success:
+            _game_changed(record, from_thread=True)
+        raise HTTPException(status_code=400, detail="Time expired")
     if not success:
         logger.warning("Illegal move attempted: %s -> %s", from_pos, to_pos)
         raise HTTPException(status_code=400, detail="Illegal move")
-    
-    logger.info("Board AFTER move:")
-    logger.info("\n" + game.display())
-    
+
+    game = record.game
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Board AFTER move:")
+        logger.info("\n" + game.display())
+
+    if ponderer.enabled:
+        ponderer.resolve(game_id, game.to_fen())
+    _game_changed(record, from_thread=True)
+
     return {
         "ok": True,
+        "game_id": record.game_id,
+        "version": record.version,
         "board": serialize_board(game.board),
         "current_turn": game.current_turn,
+        "clock": game.clock.to_dict() if game.clock else None,
     }
 
+@app.post("/games/{game_id}/engine-move")
+async def make_engine_move(game_id: str):
+    """Let the engine play the side to move"""
+    try:
+        record = await run_in_threadpool(store.get, game_id)
+    except GameNotFoundError:
+        raise HTTPException(status_code=404, detail="Game not found")
+    if record.game.status != GameStatus.ACTIVE:
+        raise HTTPException(status_code=400, detail="Game is over")
+
+    fen = record.game.to_fen()
+    result = None
+    job = ponderer.take(game_id, fen)
+    if job is not None:
+        result = await job.result()
+        if result is not None and result["depth"] < ENGINE_LIMITS.depth:
+            # Ponder budget ran out before reaching full depth
+            result = None
+        analysis_cache.store(record.game, 1, result)
+    if result is None:
+        result = await analysis_cache.analyze(record.game, ENGINE_LIMITS.depth)
+    if result is None or not result["lines"]:
+        raise HTTPException(status_code=500, detail="Engine found no move")
+
+    pv = result["lines"][0]["pv"]
+    move = Move.from_uci(pv[0])
+
+    play = _move_mutation(move.from_pos, move.to_pos, move.promotion_piece)
+    try:
+        success, record = await run_in_threadpool(store.update, game_id, play, record.version)
+    except VersionConflictError:
+        raise HTTPException(status_code=409, detail="Game has changed")
+    if record.game.is_timeout():
+        if success:
+            _game_changed(record, from_thread=False)
+        raise HTTPException(status_code=400, detail="Time expired")
+    if not success:
+        raise HTTPException(status_code=500, detail="Engine move was illegal")
+
+    game = record.game
+    _game_changed(record, from_thread=False)
+    if ponderer.enabled and len(pv) > 1 and game.status == GameStatus.ACTIVE:
+        predicted = game.copy()
+        reply = Move.from_uci(pv[1])
+        if predicted.make_move(reply.from_pos, reply.to_pos, reply.promotion_piece):
+            await run_in_threadpool(ponderer.start, game_id, predicted.to_fen())
+
+    return {
+        "ok": True,
+        "game_id": record.game_id,
+        "version": record.version,
+        "move": move.uci(),
+        "board": serialize_board(game.board),
+        "current_turn": game.current_turn,
+        "clock": game.clock.to_dict() if game.clock else None,
+    }
+
+@app.websocket("/games/{game_id}/watch")
+async def watch_game(websocket: WebSocket, game_id: str):
+    """
+    Push the full game state to a spectator after every move. Frames are
+    binary messages holding UTF-8 JSON, shared by all spectators of a game.
+    """
+    try:
+        record = await run_in_threadpool(store.get, game_id)
+    except GameNotFoundError:
+        await websocket.close(code=4404)
+        return
+    await websocket.accept()
+
+    subscriber = spectators.subscribe(game_id)
+    hub = spectators.hub(game_id)
+    if hub.version < record.version:
+        hub.publish(record.version, spectator_frame(record))
+
+    async def wait_for_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    # Notice spectators leaving even while no moves are being sent
+    listener = asyncio.create_task(wait_for_disconnect())
+    listener.add_done_callback(lambda _: subscriber.close())
+    try:
+        while True:
+            frame = await subscriber.next()
+            if frame is None:
+                break
+            await asyncio.wait_for(websocket.send_bytes(frame), SPECTATOR_SEND_TIMEOUT)
+    except (WebSocketDisconnect, asyncio.TimeoutError):
+        pass
+    finally:
+        client_left = listener.done()
+        listener.cancel()
+        spectators.unsubscribe(game_id, subscriber)
+    if not client_left:
+        try:
+            await websocket.close()
+        except RuntimeError:
+            # Already closed by the client
+            pass
+
+async def _resolve_position(fen: Optional[str], game_id: Optional[str]) -> Game:
+    """Game for a request that names exactly one of a FEN or a game id"""
+    if (fen is None) == (game_id is None):
+        raise HTTPException(status_code=400, detail="Give exactly one of fen or game_id")
+    if game_id is not None:
+        try:
+            return (await run_in_threadpool(store.get, game_id)).game
+        except GameNotFoundError:
+            raise HTTPException(status_code=404, detail="Game not found")
+    try:
+        # from_fen generates every legal move to set the status
+        return await run_in_threadpool(Game.from_fen, fen)
+    except (ValueError, IndexError):
+        raise HTTPException(status_code=400, detail="Invalid FEN")
+
+@app.get("/hint")
+async def hint(
+    fen: Optional[str] = None,
+    game_id: Optional[str] = None,
+    depth: int = Query(3, ge=1),
+    multipv: int = Query(1, ge=1, le=10),
+):
+    """Best lines for a position, shared between concurrent identical requests"""
+    game = await _resolve_position(fen, game_id)
+    result = await analysis_cache.analyze(game, min(depth, MAX_ANALYSIS_DEPTH), multipv)
+    if result is None:
+        raise HTTPException(status_code=400, detail="No legal moves")
+    return result
+
+@app.get("/analyze")
+async def analyze(
+    request: Request,
+    fen: Optional[str] = None,
+    game_id: Optional[str] = None,
+    depth: int = Query(4, ge=1),
+    multipv: int = Query(3, ge=1, le=10),
+):
+    """Stream deepening evaluations of a position as Server-Sent Events"""
+    game = await _resolve_position(fen, game_id)
+    depth = min(depth, MAX_ANALYSIS_DEPTH)
+
+    async def events():
+        # Identical requests share one search; closing the iterator leaves it
+        async with aclosing(analysis_cache.stream(game, depth, multipv)) as infos:
+            async for info in infos:
+                if await request.is_disconnected():
+                    return
+                yield f"event: info\ndata: {json.dumps(info)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -2,8 +2,9 @@ from app.models.piece import Piece, Color, PieceType, King, Queen, Rook, Bishop,
 from app.models.position import Position
 from app.models.board import Board
 from app.models.game import Game, GameStatus, Move
+from app.models.clock import GameClock
 
 __all__ = [
     'Piece', 'Color', 'PieceType', 'King', 'Queen', 'Rook', 'Bishop', 'Knight', 'Pawn',
-    'Position', 'Board', 'Game', 'GameStatus', 'Move'
+    'Position', 'Board', 'Game', 'GameStatus', 'Move', 'GameClock'
 ]
\ No newline at end of file
@@ -1,11 +1,23 @@
 from typing import List, Optional, Tuple, Dict
-from copy import deepcopy
 
 from app.models.position import Position
 from app.models.piece import (
     Piece, PieceType, Color, King, Queen, Rook, Bishop, Knight, Pawn
 )
 
+PIECE_VALUES: Dict[PieceType, int] = {
+    PieceType.PAWN: 100,
+    PieceType.KNIGHT: 320,
+    PieceType.BISHOP: 330,
+    PieceType.ROOK: 500,
+    PieceType.QUEEN: 900,
+    PieceType.KING: 0,
+}
+
+# Bonus for standing near the centre, by distance from it (0 = d4/e4/d5/e5)
+CENTRE_BONUS = [20, 10, 0, -10]
+
+
 class Board():
     """Represents the 8x8 chess board and piece placement."""
 
@@ -36,8 +48,13 @@ class Board():
     
     def clone(self) -> "Board":
         """Deep clone the board so legal-move simulation works."""
-        new_board = Board()
-        new_board.grid = deepcopy(self.grid)
+        # Pieces only hold a color and a moved flag, so copying them directly
+        # is much cheaper than deepcopy and this runs for every candidate move.
+        new_board = Board.__new__(Board)
+        new_board.grid = [
+            [piece.__class__(piece.color, piece.has_moved) if piece else None for piece in row]
+            for row in self.grid
+        ]
         return new_board
     
     def get_all_pieces(self, color: Color) -> List[Tuple[Position, Piece]]:
@@ -83,6 +100,28 @@ class Board():
             attacker_color=color.opposite()
         )
     
+    def evaluate(self, color: Color) -> int:
+        """
+        Static evaluation in centipawns from color's point of view:
+        material, plus small bonuses for central minor pieces and pawns
+        and for advanced pawns.
+        """
+        score = 0
+        for r in range(8):
+            for c in range(8):
+                piece = self.grid[r][c]
+                if piece is None:
+                    continue
+                value = PIECE_VALUES[piece.piece_type]
+                if piece.piece_type in (PieceType.KNIGHT, PieceType.BISHOP, PieceType.PAWN):
+                    distance = max(abs(2 * r - 7), abs(2 * c - 7)) // 2
+                    value += CENTRE_BONUS[distance] // (2 if piece.piece_type == PieceType.PAWN else 1)
+                if piece.piece_type == PieceType.PAWN:
+                    advanced = 6 - r if piece.color == Color.WHITE else r - 1
+                    value += 5 * advanced
+                score += value if piece.color == color else -value
+        return score
+    
     def check_starting_square(self, piece: Piece, row: int, col: int) -> bool:
         t = piece.piece_type
         c = piece.color
@@ -0,0 +1,67 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from app.models.piece import Color
+
+
+@dataclass
+class GameClock:
+    """
+    Fischer clock: every player starts with base seconds and gains increment
+    seconds after each of their moves. Times are wall-clock (time.time())
+    so that any server process can work out who is on the clock.
+
+    The clock starts with White's first move, which is not timed.
+    """
+    base: float
+    increment: float = 0.0
+    remaining: Dict[Color, float] = field(default_factory=dict)
+    running: Optional[Color] = None
+    turn_started: Optional[float] = None
+
+    def __post_init__(self):
+        if not self.remaining:
+            self.remaining = {Color.WHITE: self.base, Color.BLACK: self.base}
+
+    def copy(self) -> "GameClock":
+        return GameClock(self.base, self.increment, dict(self.remaining), self.running, self.turn_started)
+
+    def time_left(self, color: Color, now: float) -> float:
+        """Seconds left for color at time now"""
+        left = self.remaining[color]
+        if color == self.running:
+            left -= now - self.turn_started
+        return left
+
+    def deadline(self) -> Optional[float]:
+        """When the player on the clock runs out of time, if the clock is running"""
+        if self.running is None:
+            return None
+        return self.turn_started + self.remaining[self.running]
+
+    def is_flagged(self, now: float) -> bool:
+        return self.running is not None and self.time_left(self.running, now) <= 0
+
+    def press(self, color: Color, now: float) -> None:
+        """color finished a move at time now; start the opponent's clock"""
+        if self.running == color:
+            self.remaining[color] = self.time_left(color, now) + self.increment
+        self.running = color.opposite()
+        self.turn_started = now
+
+    def stop(self, now: float) -> None:
+        """Stop the clock, charging the running player up to now"""
+        if self.running is not None:
+            self.remaining[self.running] = max(0.0, self.time_left(self.running, now))
+        self.running = None
+        self.turn_started = None
+
+    def to_dict(self) -> dict:
+        return {
+            "base": self.base,
+            "increment": self.increment,
+            "white": self.remaining[Color.WHITE],
+            "black": self.remaining[Color.BLACK],
+            "running": self.running.value if self.running else None,
+            "turn_started": self.turn_started,
+        }
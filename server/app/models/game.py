@@ -1,14 +1,19 @@
+import time
 from typing import Optional, List
 from enum import Enum
 from app.models.board import Board
+from app.models.clock import GameClock
 from app.models.position import Position
 from app.models.piece import Color, Piece, PieceType, King, Rook, Pawn
 
+PROMOTION_TYPES = [PieceType.QUEEN, PieceType.ROOK, PieceType.BISHOP, PieceType.KNIGHT]
+
 class GameStatus(Enum):
     ACTIVE = "active"
     CHECKMATE = "checkmate"
     STALEMATE = "stalemate"
     DRAW = "draw"
+    TIMEOUT = "timeout"
 
 class Move:
     """Represents a chess move"""
@@ -30,11 +35,31 @@ class Move:
     
     def __repr__(self) -> str:
         return f"Move({self.from_pos}, {self.to_pos})"
+    
+    def uci(self) -> str:
+        """Move in UCI notation (e.g., e7e8q)"""
+        text = f"{self.from_pos.to_algebraic()}{self.to_pos.to_algebraic()}"
+        if self.promotion_piece:
+            text += "n" if self.promotion_piece == PieceType.KNIGHT else self.promotion_piece.value[0]
+        return text
+    
+    @classmethod
+    def from_uci(cls, text: str) -> "Move":
+        """Create a Move from UCI notation (e.g., 'e2e4', 'e7e8q')"""
+        if len(text) not in (4, 5):
+            raise ValueError(f"Invalid UCI move: {text}")
+        promotion = None
+        if len(text) == 5:
+            promotions = {"q": PieceType.QUEEN, "r": PieceType.ROOK, "b": PieceType.BISHOP, "n": PieceType.KNIGHT}
+            if text[4] not in promotions:
+                raise ValueError(f"Invalid promotion in UCI move: {text}")
+            promotion = promotions[text[4]]
+        return cls(Position.from_algebraic(text[:2]), Position.from_algebraic(text[2:4]), promotion)
 
 class Game:
     """Main game class that handles all chess logic"""
     
-    def __init__(self):
+    def __init__(self, clock: Optional[GameClock] = None):
         self.board = Board()
         self.board.setup_initial_position()
         self.current_turn = Color.WHITE
@@ -43,11 +68,131 @@ class Game:
         self.game_history: List[tuple[GameStatus, Board]] = [
             (GameStatus.ACTIVE, self.board.clone())
         ]
+        # Double pawn push that led to the starting position, if any (from FEN)
+        self.start_last_move: Optional[Move] = None
+        self.clock = clock
+    
+    @classmethod
+    def from_fen(cls, fen: str) -> "Game":
+        """
+        Create a game from a FEN string. Only the placement field is required;
+        side to move, castling rights and en passant square are honoured when given.
+        """
+        fields = fen.split()
+        if not fields:
+            raise ValueError("Empty FEN")
+        
+        game = cls.__new__(cls)
+        game.board = Board(fields[0])
+        game.current_turn = Color.BLACK if len(fields) > 1 and fields[1] == "b" else Color.WHITE
+        game.move_history = []
+        game.status = GameStatus.ACTIVE
+        game.start_last_move = None
+        game.clock = None
+        
+        # The board guesses has_moved from starting squares; castling rights can only remove rights
+        castling = fields[2] if len(fields) > 2 else "KQkq"
+        for color, row, kingside, queenside in ((Color.WHITE, 7, "K", "Q"), (Color.BLACK, 0, "k", "q")):
+            for right, col in ((kingside, 7), (queenside, 0)):
+                rook = game.board.get_piece(Position(row, col))
+                if right not in castling and isinstance(rook, Rook) and rook.color == color:
+                    rook.has_moved = True
+            king = game.board.get_piece(Position(row, 4))
+            if kingside not in castling and queenside not in castling and isinstance(king, King):
+                king.has_moved = True
+        
+        if len(fields) > 3 and fields[3] != "-":
+            target = Position.from_algebraic(fields[3])
+            # The pawn that just moved two squares belongs to the side not to move
+            step = 1 if game.current_turn == Color.WHITE else -1
+            game.start_last_move = Move(
+                Position(target.row - step, target.col),
+                Position(target.row + step, target.col),
+            )
+        
+        game.game_history = [(GameStatus.ACTIVE, game.board.clone())]
+        game._update_game_status()
+        game.game_history[0] = (game.status, game.game_history[0][1])
+        return game
+    
+    def castling_rights(self) -> str:
+        """Castling rights in FEN form (e.g., 'KQkq'), '-' if none"""
+        rights = ""
+        for row, symbols in ((7, "KQ"), (0, "kq")):
+            king = self.board.get_piece(Position(row, 4))
+            if not isinstance(king, King) or king.has_moved:
+                continue
+            for col, symbol in ((7, symbols[0]), (0, symbols[1])):
+                rook = self.board.get_piece(Position(row, col))
+                if isinstance(rook, Rook) and not rook.has_moved and rook.color == king.color:
+                    rights += symbol
+        return rights or "-"
+    
+    def en_passant_target(self) -> Optional[Position]:
+        """Square passed over by a pawn that just moved two squares"""
+        move = self.last_move
+        if move is None or abs(move.from_pos.row - move.to_pos.row) != 2:
+            return None
+        if not isinstance(self.board.get_piece(move.to_pos), Pawn):
+            return None
+        return Position((move.from_pos.row + move.to_pos.row) // 2, move.to_pos.col)
+    
+    def to_fen(self) -> str:
+        """Current position as a FEN string"""
+        rows = []
+        for r in range(8):
+            row, empty = "", 0
+            for c in range(8):
+                piece = self.board.grid[r][c]
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                row += piece.symbol()
+            rows.append(row + (str(empty) if empty else ""))
+        
+        target = self.en_passant_target()
+        return " ".join([
+            "/".join(rows),
+            "w" if self.current_turn == Color.WHITE else "b",
+            self.castling_rights(),
+            target.to_algebraic() if target else "-",
+            "0",
+            str(len(self.move_history) // 2 + 1),
+        ])
+    
+    def copy(self) -> "Game":
+        """
+        Copy the game so it can be changed without affecting this one.
+        Past boards in game_history are never modified, so they are shared.
+        """
+        new_game = Game.__new__(Game)
+        new_game.board = self.board.clone()
+        new_game.current_turn = self.current_turn
+        new_game.move_history = list(self.move_history)
+        new_game.status = self.status
+        new_game.game_history = list(self.game_history)
+        new_game.start_last_move = self.start_last_move
+        new_game.clock = self.clock.copy() if self.clock else None
+        return new_game
     
     @property
     def last_move(self) -> Optional[Move]:
         """Get the last move played"""
-        return self.move_history[-1] if self.move_history else None
+        return self.move_history[-1] if self.move_history else self.start_last_move
+    
+    def get_all_legal_moves(self) -> List[Move]:
+        """Get every legal move for the side to move, one Move per promotion choice"""
+        moves = []
+        for pos, piece in self.board.get_all_pieces(self.current_turn):
+            for target in self.get_legal_moves(pos):
+                if isinstance(piece, Pawn) and target.row in (0, 7):
+                    moves.extend(Move(pos, target, piece_type) for piece_type in PROMOTION_TYPES)
+                else:
+                    moves.append(Move(pos, target))
+        return moves
     
     def get_legal_moves(self, position: Position) -> List[Position]:
         """Get all legal moves for the piece at the given position"""
@@ -99,6 +244,10 @@ class Game:
         if self.status != GameStatus.ACTIVE:
             return False
         
+        now = time.time()
+        if self.check_timeout(now):
+            return False
+        
         piece = self.board.get_piece(from_pos)
         if not piece or piece.color != self.current_turn:
             return False
@@ -109,6 +258,33 @@ class Game:
         
         # Create move object
         move = Move(from_pos, to_pos, promotion_piece)
+        self.apply_legal_move(move)
+        
+        if self.clock:
+            self.clock.press(self.current_turn.opposite(), now)
+        
+        # Update game status
+        self._update_game_status()
+        if self.clock and self.status != GameStatus.ACTIVE:
+            self.clock.stop(now)
+
+        self.game_history.append((self.status, self.board.clone()))
+        
+        return True
+    
+    def apply_legal_move(self, move: Move) -> None:
+        """
+        Play a move that is already known to be legal, e.g. one returned by
+        get_all_legal_moves. The game status and game_history are not updated.
+        """
+        self._apply_move(move)
+        self.move_history.append(move)
+        self.current_turn = self.current_turn.opposite()
+    
+    def _apply_move(self, move: Move) -> None:
+        """Update the board for a move that is already known to be legal"""
+        from_pos, to_pos = move.from_pos, move.to_pos
+        piece = self.board.get_piece(from_pos)
         
         # Handle special moves
         if isinstance(piece, King) and abs(to_pos.col - from_pos.col) == 2:
@@ -125,20 +301,7 @@ class Game:
         if isinstance(piece, Pawn):
             promotion_row = 0 if piece.color == Color.WHITE else 7
             if to_pos.row == promotion_row:
-                self._promote_pawn(to_pos, promotion_piece or PieceType.QUEEN)
-        
-        # Add to history
-        self.move_history.append(move)
-        
-        # Switch turns
-        self.current_turn = self.current_turn.opposite()
-        
-        # Update game status
-        self._update_game_status()
-
-        self.game_history.append((self.status, self.board.clone()))
-        
-        return True
+                self._promote_pawn(to_pos, move.promotion_piece or PieceType.QUEEN)
     
     def _get_castling_moves(self, king_pos: Position) -> List[Position]:
         """Get castling moves for the king"""
@@ -260,6 +423,25 @@ class Game:
             else:
                 self.status = GameStatus.STALEMATE
     
+    def check_timeout(self, now: Optional[float] = None) -> bool:
+        """
+        End the game if the side to move has run out of time.
+        Returns True if the game ended now.
+        """
+        if self.clock is None or self.status != GameStatus.ACTIVE:
+            return False
+        now = time.time() if now is None else now
+        if not self.clock.is_flagged(now):
+            return False
+        self.clock.stop(now)
+        self.status = GameStatus.TIMEOUT
+        self.game_history[-1] = (self.status, self.game_history[-1][1])
+        return True
+    
+    def is_timeout(self) -> bool:
+        """Check if the side to move lost on time"""
+        return self.status == GameStatus.TIMEOUT
+    
     def is_checkmate(self) -> bool:
         """Check if current position is checkmate"""
         return self.status == GameStatus.CHECKMATE
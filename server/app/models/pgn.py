@@ -0,0 +1,177 @@
+"""
+Standard algebraic notation (SAN) and PGN reading.
+
+Only what is needed to replay games is supported: tag pairs, the main
+line of the movetext and the result. Comments, variations and numeric
+annotation glyphs are skipped.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.models.game import Game, Move
+from app.models.piece import King, Pawn, PieceType
+
+_PIECE_LETTERS = {
+    "K": PieceType.KING, "Q": PieceType.QUEEN, "R": PieceType.ROOK,
+    "B": PieceType.BISHOP, "N": PieceType.KNIGHT,
+}
+_LETTERS_BY_TYPE = {piece_type: letter for letter, piece_type in _PIECE_LETTERS.items()}
+
+_SAN_RE = re.compile(
+    r"^(?P<piece>[KQRBN])?(?P<from_file>[a-h])?(?P<from_rank>[1-8])?x?"
+    r"(?P<to>[a-h][1-8])(?:=?(?P<promotion>[QRBN]))?$"
+)
+_TAG_RE = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+_RESULTS = {"1-0", "0-1", "1/2-1/2", "*"}
+
+
+@dataclass
+class PgnGame:
+    """One game read from a PGN file"""
+    headers: Dict[str, str] = field(default_factory=dict)
+    moves: List[str] = field(default_factory=list)  # SAN
+    result: str = "*"
+
+    def replay(self) -> Iterator[Game]:
+        """
+        Yield the game after each move. The same Game object is yielded
+        every time, so copy it to keep a position.
+        """
+        fen = self.headers.get("FEN")
+        game = Game.from_fen(fen) if fen else Game()
+        for san in self.moves:
+            move = san_to_move(game, san)
+            if not game.make_move(move.from_pos, move.to_pos, move.promotion_piece):
+                raise ValueError(f"Illegal move in PGN: {san}")
+            yield game
+
+
+def san_to_move(game: Game, san: str) -> Move:
+    """Find the legal move for the side to move that matches a SAN string"""
+    text = san.rstrip("+#!?")
+    legal_moves = game.get_all_legal_moves()
+
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        target_col = 6 if text in ("O-O", "0-0") else 2
+        for move in legal_moves:
+            piece = game.board.get_piece(move.from_pos)
+            if (isinstance(piece, King) and move.from_pos.col == 4
+                    and move.to_pos.col == target_col):
+                return move
+        raise ValueError(f"Illegal castling: {san}")
+
+    match = _SAN_RE.match(text)
+    if not match:
+        raise ValueError(f"Invalid SAN: {san}")
+
+    piece_type = _PIECE_LETTERS.get(match["piece"], PieceType.PAWN)
+    promotion = _PIECE_LETTERS.get(match["promotion"]) if match["promotion"] else None
+    candidates = []
+    for move in legal_moves:
+        piece = game.board.get_piece(move.from_pos)
+        if piece.piece_type != piece_type or move.to_pos.to_algebraic() != match["to"]:
+            continue
+        if move.promotion_piece != promotion:
+            continue
+        square = move.from_pos.to_algebraic()
+        if match["from_file"] and square[0] != match["from_file"]:
+            continue
+        if match["from_rank"] and square[1] != match["from_rank"]:
+            continue
+        candidates.append(move)
+
+    if len(candidates) != 1:
+        reason = "Ambiguous" if candidates else "Illegal"
+        raise ValueError(f"{reason} move: {san}")
+    return candidates[0]
+
+
+def move_to_san(game: Game, move: Move) -> str:
+    """SAN for a legal move of the side to move, with check and mate suffixes"""
+    piece = game.board.get_piece(move.from_pos)
+    if isinstance(piece, King) and abs(move.to_pos.col - move.from_pos.col) == 2:
+        san = "O-O" if move.to_pos.col == 6 else "O-O-O"
+    else:
+        target = game.board.get_piece(move.to_pos)
+        is_capture = target is not None or (
+            isinstance(piece, Pawn) and move.from_pos.col != move.to_pos.col
+        )
+        if isinstance(piece, Pawn):
+            san = move.from_pos.to_algebraic()[0] + "x" if is_capture else ""
+            san += move.to_pos.to_algebraic()
+            if move.to_pos.row in (0, 7):
+                san += "=" + _LETTERS_BY_TYPE[move.promotion_piece or PieceType.QUEEN]
+        else:
+            san = _LETTERS_BY_TYPE[piece.piece_type]
+            rivals = [
+                other.from_pos for other in game.get_all_legal_moves()
+                if other.to_pos == move.to_pos and other.from_pos != move.from_pos
+                and game.board.get_piece(other.from_pos).piece_type == piece.piece_type
+            ]
+            if rivals:
+                if all(pos.col != move.from_pos.col for pos in rivals):
+                    san += move.from_pos.to_algebraic()[0]
+                elif all(pos.row != move.from_pos.row for pos in rivals):
+                    san += move.from_pos.to_algebraic()[1]
+                else:
+                    san += move.from_pos.to_algebraic()
+            san += ("x" if is_capture else "") + move.to_pos.to_algebraic()
+
+    after = game.copy()
+    after.make_move(move.from_pos, move.to_pos, move.promotion_piece)
+    if after.is_checkmate():
+        san += "#"
+    elif after.is_check():
+        san += "+"
+    return san
+
+
+def _movetext_tokens(movetext: str) -> Iterator[str]:
+    depth = 0
+    for token in re.findall(r"\{[^}]*\}|;[^\n]*|\(|\)|[^\s(){};]+", movetext):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0 and not token.startswith(("{", ";", "$")):
+            yield token
+
+
+def read_pgn(lines: Iterable[str]) -> Iterator[PgnGame]:
+    """Read games one at a time from the lines of a PGN file"""
+    headers: Dict[str, str] = {}
+    movetext: List[str] = []
+
+    def finish() -> Optional[PgnGame]:
+        if not headers and not movetext:
+            return None
+        game = PgnGame(headers=dict(headers))
+        for token in _movetext_tokens(" ".join(movetext)):
+            if token in _RESULTS:
+                game.result = token
+                continue
+            # Strip move numbers such as "12." or "12..." glued to the move
+            token = re.sub(r"^\d+\.+", "", token)
+            if token:
+                game.moves.append(token)
+        if game.result == "*" and "Result" in headers:
+            game.result = headers["Result"]
+        return game
+
+    for line in lines:
+        line = line.strip()
+        tag = _TAG_RE.match(line)
+        if tag:
+            if movetext:
+                game = finish()
+                if game:
+                    yield game
+                headers, movetext = {}, []
+            headers[tag.group(1)] = tag.group(2)
+        elif line:
+            movetext.append(line)
+
+    game = finish()
+    if game:
+        yield game
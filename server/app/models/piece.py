@@ -3,6 +3,10 @@ from enum import Enum
 from dataclasses import dataclass
 from typing import List
 from app.models.position import Position
+from app.models.tables import (
+    RAYS, KNIGHT_MOVES, KING_MOVES, PAWN_ATTACKS, PAWN_PUSHES,
+    ROOK_DIRECTIONS, BISHOP_DIRECTIONS, QUEEN_DIRECTIONS,
+)
 
 class Color(Enum):
     WHITE = "white"
@@ -37,16 +41,13 @@ class Piece:
 
     # Helpers for sliding pieces like bishop/rook/queen
     def _slide(self, pos: Position, board, directions) -> List[Position]:
+        """directions are indices into the precomputed rays (see tables.DIRECTIONS)"""
         moves = []
-        for dr, dc in directions:
-            r, c = pos.row, pos.col
-            while True:
-                r += dr
-                c += dc
-                if not (0 <= r < 8 and 0 <= c < 8):
-                    break
-                new_pos = Position(r, c)
-                piece = board.get_piece(new_pos)
+        grid = board.grid
+        rays = RAYS[pos.row * 8 + pos.col]
+        for direction in directions:
+            for new_pos in rays[direction]:
+                piece = grid[new_pos.row][new_pos.col]
                 if piece is None:
                     moves.append(new_pos)
                 else:
@@ -54,6 +55,15 @@ class Piece:
                         moves.append(new_pos)
                     break
         return moves
+
+    # Helper for pieces that jump to a fixed set of squares (king/knight)
+    def _leap(self, board, targets) -> List[Position]:
+        grid = board.grid
+        return [
+            new_pos for new_pos in targets
+            if grid[new_pos.row][new_pos.col] is None
+            or grid[new_pos.row][new_pos.col].color != self.color
+        ]
     
 class King(Piece):
     piece_type = PieceType.KING
@@ -62,17 +72,7 @@ class King(Piece):
         return "K" if self.color == Color.WHITE else "k"
 
     def get_possible_moves(self, pos: Position, board) -> List[Position]:
-        directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1),]
-        moves = []
-        for dr, dc in directions:
-            r, c = pos.row + dr, pos.col + dc
-            if 0 <= r < 8 and 0 <= c < 8:
-                new_pos = Position(r, c)
-                piece = board.get_piece(new_pos)
-                if piece is None or piece.color != self.color:
-                    moves.append(new_pos)
-
-        return moves
+        return self._leap(board, KING_MOVES[pos.row * 8 + pos.col])
     
 class Queen(Piece):
     piece_type = PieceType.QUEEN
@@ -81,11 +81,7 @@ class Queen(Piece):
         return "Q" if self.color == Color.WHITE else "q"
 
     def get_possible_moves(self, pos: Position, board) -> List[Position]:
-        directions = [
-            (-1, 0), (1, 0), (0, -1), (0, 1),      # Rook-like
-            (-1, -1), (-1, 1), (1, -1), (1, 1),    # Bishop-like
-        ]
-        return self._slide(pos, board, directions)
+        return self._slide(pos, board, QUEEN_DIRECTIONS)
     
 class Rook(Piece):
     piece_type = PieceType.ROOK
@@ -94,11 +90,7 @@ class Rook(Piece):
         return "R" if self.color == Color.WHITE else "r"
 
     def get_possible_moves(self, pos: Position, board) -> List[Position]:
-        directions = [
-            (-1, 0), (1, 0),
-            (0, -1), (0, 1)
-        ]
-        return self._slide(pos, board, directions)
+        return self._slide(pos, board, ROOK_DIRECTIONS)
 
 
 class Bishop(Piece):
@@ -108,11 +100,7 @@ class Bishop(Piece):
         return "B" if self.color == Color.WHITE else "b"
 
     def get_possible_moves(self, pos: Position, board) -> List[Position]:
-        directions = [
-            (-1, -1), (-1, 1),
-            (1, -1), (1, 1)
-        ]
-        return self._slide(pos, board, directions)
+        return self._slide(pos, board, BISHOP_DIRECTIONS)
     
 class Knight(Piece):
     piece_type = PieceType.KNIGHT
@@ -121,23 +109,7 @@ class Knight(Piece):
         return "N" if self.color == Color.WHITE else "n"
 
     def get_possible_moves(self, pos: Position, board) -> List[Position]:
-        moves = []
-        offsets = [
-            (-2, -1), (-2, 1),
-            (-1, -2), (-1, 2),
-            (1, -2),  (1, 2),
-            (2, -1),  (2, 1)
-        ]
-
-        for dr, dc in offsets:
-            r, c = pos.row + dr, pos.col + dc
-            if 0 <= r < 8 and 0 <= c < 8:
-                new_pos = Position(r, c)
-                piece = board.get_piece(new_pos)
-                if piece is None or piece.color != self.color:
-                    moves.append(new_pos)
-
-        return moves
+        return self._leap(board, KNIGHT_MOVES[pos.row * 8 + pos.col])
     
 class Pawn(Piece):
     piece_type = PieceType.PAWN
@@ -147,37 +119,24 @@ class Pawn(Piece):
 
     def get_possible_moves(self, pos: Position, board) -> List[Position]:
         moves = []
-        direction = -1 if self.color == Color.WHITE else 1
-
-        # One step forward
-        one = Position(pos.row + direction, pos.col)
-        if one.is_valid() and board.get_piece(one) is None:
-            moves.append(one)
+        color_index = 0 if self.color == Color.WHITE else 1
+        square = pos.row * 8 + pos.col
 
-            # Two steps (only if first move)
-            if not self.has_moved:
-                two = Position(pos.row + 2 * direction, pos.col)
-                if two.is_valid() and board.get_piece(two) is None:
-                    moves.append(two)
+        # One step forward, then two from the starting row, until blocked
+        for target in PAWN_PUSHES[color_index][square]:
+            if board.get_piece(target) is not None:
+                break
+            moves.append(target)
 
         # Captures
-        for dc in (-1, 1):
-            diag = Position(pos.row + direction, pos.col + dc)
-            if diag.is_valid():
-                piece = board.get_piece(diag)
-                if piece and piece.color != self.color:
-                    moves.append(diag)
+        for diag in PAWN_ATTACKS[color_index][square]:
+            piece = board.get_piece(diag)
+            if piece and piece.color != self.color:
+                moves.append(diag)
 
         return moves
     
     def get_attack_positions(self, pos: Position, board) -> List[Position]:
         """Pawns attack diagonally even if square is empty"""
-        attacks = []
-        direction = -1 if self.color == Color.WHITE else 1
-        
-        for dc in (-1, 1):
-            diag = Position(pos.row + direction, pos.col + dc)
-            if diag.is_valid():
-                attacks.append(diag)
-        
-        return attacks
\ No newline at end of file
+        color_index = 0 if self.color == Color.WHITE else 1
+        return list(PAWN_ATTACKS[color_index][pos.row * 8 + pos.col])
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Precomputed move tables, indexed by square (row * 8 + col).
+
+The tables are built once per process at import, which takes about two
+milliseconds. Every entry is a tuple of the shared Position objects in
+SQUARES, so move generation never allocates positions for targets.
+"""
+from typing import Tuple
+
+from app.models.position import Position
+
+# Directions in the order used by RAYS: rook-like first, then bishop-like
+DIRECTIONS = [
+    (-1, 0), (1, 0), (0, -1), (0, 1),
+    (-1, -1), (-1, 1), (1, -1), (1, 1),
+]
+ROOK_DIRECTIONS = (0, 1, 2, 3)
+BISHOP_DIRECTIONS = (4, 5, 6, 7)
+QUEEN_DIRECTIONS = tuple(range(8))
+
+_KNIGHT_OFFSETS = [
+    (-2, -1), (-2, 1), (-1, -2), (-1, 2),
+    (1, -2), (1, 2), (2, -1), (2, 1),
+]
+_KING_OFFSETS = DIRECTIONS
+
+Squares = Tuple[Position, ...]
+
+# One Position per square, shared by every table
+SQUARES: Tuple[Position, ...] = tuple(Position(sq // 8, sq % 8) for sq in range(64))
+
+
+def _on_board(row: int, col: int) -> bool:
+    return 0 <= row < 8 and 0 <= col < 8
+
+
+def _ray(row: int, col: int, dr: int, dc: int) -> Squares:
+    ray = []
+    r, c = row + dr, col + dc
+    while _on_board(r, c):
+        ray.append(SQUARES[r * 8 + c])
+        r, c = r + dr, c + dc
+    return tuple(ray)
+
+
+def _leaps(offsets) -> Tuple[Squares, ...]:
+    return tuple(
+        tuple(
+            SQUARES[(row + dr) * 8 + col + dc]
+            for dr, dc in offsets if _on_board(row + dr, col + dc)
+        )
+        for row, col in (divmod(sq, 8) for sq in range(64))
+    )
+
+
+def _pawn_attacks(direction: int) -> Tuple[Squares, ...]:
+    return _leaps([(direction, -1), (direction, 1)])
+
+
+def _pawn_pushes(direction: int, start_row: int) -> Tuple[Squares, ...]:
+    pushes = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        targets = []
+        if _on_board(row + direction, col):
+            targets.append(SQUARES[(row + direction) * 8 + col])
+            if row == start_row:
+                targets.append(SQUARES[(row + 2 * direction) * 8 + col])
+        pushes.append(tuple(targets))
+    return tuple(pushes)
+
+
+# RAYS[sq][direction] - squares in that direction, nearest first
+# KNIGHT_MOVES[sq], KING_MOVES[sq] - squares reachable on an empty board
+# PAWN_ATTACKS[color][sq], PAWN_PUSHES[color][sq] - color 0 is white, 1 is black;
+#   pushes hold the single step and, from the starting row, the double step.
+#   White pawns move towards row 0, black pawns towards row 7.
+RAYS: Tuple[Tuple[Squares, ...], ...] = tuple(
+    tuple(_ray(row, col, dr, dc) for dr, dc in DIRECTIONS)
+    for row, col in (divmod(sq, 8) for sq in range(64))
+)
+KNIGHT_MOVES = _leaps(_KNIGHT_OFFSETS)
+KING_MOVES = _leaps(_KING_OFFSETS)
+PAWN_ATTACKS = (_pawn_attacks(-1), _pawn_attacks(1))
+PAWN_PUSHES = (_pawn_pushes(-1, 6), _pawn_pushes(1, 1))
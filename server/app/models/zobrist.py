@@ -0,0 +1,44 @@
+"""
+Zobrist hashing of game positions.
+
+The keys come from a fixed seed, so a position hashes to the same value
+in every process and on every run.
+"""
+import random
+from typing import List
+
+from app.models.piece import Color, PieceType
+
+_rng = random.Random(0x5EED_C4E55)
+
+_PIECE_TYPES = list(PieceType)
+
+# PIECE_KEYS[color][piece type][square]
+PIECE_KEYS: List[List[List[int]]] = [
+    [[_rng.getrandbits(64) for _ in range(64)] for _ in _PIECE_TYPES]
+    for _ in Color
+]
+SIDE_KEY = _rng.getrandbits(64)
+CASTLING_KEYS = {symbol: _rng.getrandbits(64) for symbol in "KQkq"}
+EN_PASSANT_KEYS = [_rng.getrandbits(64) for _ in range(8)]
+
+
+def zobrist_hash(game) -> int:
+    """64-bit hash of the pieces, side to move, castling rights and en passant file"""
+    h = 0
+    grid = game.board.grid
+    for r in range(8):
+        for c in range(8):
+            piece = grid[r][c]
+            if piece is not None:
+                color_index = 0 if piece.color == Color.WHITE else 1
+                h ^= PIECE_KEYS[color_index][_PIECE_TYPES.index(piece.piece_type)][r * 8 + c]
+
+    if game.current_turn == Color.BLACK:
+        h ^= SIDE_KEY
+    for symbol in game.castling_rights():
+        h ^= CASTLING_KEYS.get(symbol, 0)
+    target = game.en_passant_target()
+    if target is not None:
+        h ^= EN_PASSANT_KEYS[target.col]
+    return h
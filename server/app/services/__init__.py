@@ -0,0 +1,8 @@
+from app.services.broadcast import BroadcastRegistry, BroadcastHub, Subscriber
+from app.services.state_cache import EncodedStateCache, etag_matches
+from app.services.timer_wheel import TimerWheel
+
+__all__ = [
+    'BroadcastRegistry', 'BroadcastHub', 'Subscriber',
+    'EncodedStateCache', 'etag_matches', 'TimerWheel'
+]
@@ -0,0 +1,129 @@
+"""
+Fan-out of game updates to spectators.
+
+Each update is encoded once into bytes and the same buffer is queued for
+every subscriber. Queues are bounded: when a subscriber falls behind, the
+frames it has not sent yet are dropped in favour of the newest one, since
+every frame carries the full state. A subscriber that has not taken a
+frame for stall_timeout seconds is disconnected, so one slow client costs
+the others nothing.
+
+Everything here runs on the event loop; use publish_threadsafe from
+threadpool handlers.
+"""
+import asyncio
+import time
+from typing import Dict, Optional, Set
+
+
+class Subscriber:
+    """One spectator connection"""
+
+    def __init__(self, max_queue: int):
+        self._queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(max_queue)
+        self.closed = False
+        self.coalesced = 0
+        self.last_taken = time.monotonic()
+
+    def offer(self, frame: bytes) -> None:
+        if self.closed:
+            return
+        if self._queue.full():
+            # Older frames are superseded by this one
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self.coalesced += 1
+        self._queue.put_nowait(frame)
+
+    def is_stalled(self, now: float, stall_timeout: float) -> bool:
+        return not self._queue.empty() and now - self.last_taken > stall_timeout
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    async def next(self) -> Optional[bytes]:
+        """Next frame to send, or None once the subscriber is closed"""
+        frame = await self._queue.get()
+        self.last_taken = time.monotonic()
+        return frame
+
+
+class BroadcastHub:
+    """Subscribers of one game and the latest frame sent to them"""
+
+    def __init__(self, max_queue: int, stall_timeout: float):
+        self.max_queue = max_queue
+        self.stall_timeout = stall_timeout
+        self.subscribers: Set[Subscriber] = set()
+        self.version = -1
+        self.latest: Optional[bytes] = None
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self.max_queue)
+        if self.latest is not None:
+            subscriber.offer(self.latest)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subscriber.close()
+        self.subscribers.discard(subscriber)
+
+    def publish(self, version: int, frame: bytes) -> None:
+        """Send a frame to every subscriber; frames older than the latest are ignored"""
+        if version <= self.version:
+            return
+        self.version = version
+        self.latest = frame
+        now = time.monotonic()
+        for subscriber in list(self.subscribers):
+            if subscriber.is_stalled(now, self.stall_timeout):
+                self.unsubscribe(subscriber)
+            else:
+                subscriber.offer(frame)
+
+
+class BroadcastRegistry:
+    """Hubs for every watched game. Hubs exist only while someone watches."""
+
+    def __init__(self, max_queue: int = 8, stall_timeout: float = 10.0):
+        self.max_queue = max_queue
+        self.stall_timeout = stall_timeout
+        self._hubs: Dict[str, BroadcastHub] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def is_watched(self, game_id: str) -> bool:
+        return game_id in self._hubs
+
+    def subscribe(self, game_id: str) -> Subscriber:
+        self._loop = asyncio.get_running_loop()
+        hub = self._hubs.get(game_id)
+        if hub is None:
+            hub = self._hubs[game_id] = BroadcastHub(self.max_queue, self.stall_timeout)
+        return hub.subscribe()
+
+    def unsubscribe(self, game_id: str, subscriber: Subscriber) -> None:
+        hub = self._hubs.get(game_id)
+        if hub is None:
+            return
+        hub.unsubscribe(subscriber)
+        if not hub.subscribers:
+            del self._hubs[game_id]
+
+    def hub(self, game_id: str) -> Optional[BroadcastHub]:
+        return self._hubs.get(game_id)
+
+    def publish(self, game_id: str, version: int, frame: bytes) -> None:
+        hub = self._hubs.get(game_id)
+        if hub is not None:
+            hub.publish(version, frame)
+
+    def publish_threadsafe(self, game_id: str, version: int, frame: bytes) -> None:
+        """publish from a thread other than the event loop's"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.publish, game_id, version, frame)
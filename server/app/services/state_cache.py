@@ -0,0 +1,49 @@
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class EncodedStateCache:
+    """
+    Encoded game-state responses and their ETags, one entry per game,
+    valid only for the version they were built from. Least recently used
+    games are dropped once max_games is reached.
+    """
+
+    def __init__(self, max_games: int = 10_000):
+        self.max_games = max_games
+        self._entries: "OrderedDict[str, Tuple[int, str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, game_id: str, version: int) -> Optional[Tuple[str, bytes]]:
+        """(etag, body) if cached for exactly this version"""
+        with self._lock:
+            entry = self._entries.get(game_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(game_id)
+            return entry[1], entry[2]
+
+    def put(self, game_id: str, version: int, etag: str, body: bytes) -> None:
+        with self._lock:
+            current = self._entries.get(game_id)
+            if current is not None and current[0] > version:
+                return
+            self._entries[game_id] = (version, etag, body)
+            self._entries.move_to_end(game_id)
+            while len(self._entries) > self.max_games:
+                self._entries.popitem(last=False)
+
+    def discard(self, game_id: str) -> None:
+        with self._lock:
+            self._entries.pop(game_id, None)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value covers etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
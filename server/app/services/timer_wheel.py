@@ -0,0 +1,118 @@
+"""
+Hierarchical timing wheel for large numbers of timers.
+
+Time is divided into ticks. Level 0 has one slot per tick; every slot of
+level n covers a full turn of level n - 1. A timer goes into the lowest
+level that can hold it, and when a level turns over, the timers in its
+next slot are moved down a level. Scheduling and cancelling are O(1),
+and each tick only looks at the one slot that is due.
+
+Timers are keyed, e.g. by game id: scheduling a key again replaces its
+timer. The wheel is driven by run() on the event loop; use the
+*_threadsafe methods from other threads.
+"""
+import asyncio
+import math
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class TimerWheel:
+    def __init__(self, tick: float = 0.1, slots: int = 256, levels: int = 4):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self._wheels: List[List[Dict[Hashable, Tuple[int, Callable]]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        # key -> (level, slot) so cancelling does not have to search
+        self._where: Dict[Hashable, Tuple[int, int]] = {}
+        self._current = self._tick_of(time.time())
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def _tick_of(self, when: float) -> int:
+        return math.floor(when / self.tick)
+
+    def schedule(self, key: Hashable, deadline: float, callback: Callable[[Hashable], None]) -> None:
+        """Call callback(key) once the wall-clock time deadline has passed"""
+        self.cancel(key)
+        # Round up: tick t fires once now >= t * tick, so never before the deadline
+        due = math.ceil(deadline / self.tick)
+        self._insert(key, max(due, self._current + 1), callback)
+
+    def _insert(self, key: Hashable, due: int, callback: Callable) -> None:
+        span = 1
+        for level in range(self.levels):
+            # Lowest level whose wheel reaches the due tick before wrapping;
+            # timers beyond the top level come round again and are re-placed
+            if due // span - self._current // span < self.slots or level == self.levels - 1:
+                slot = (due // span) % self.slots
+                self._wheels[level][slot][key] = (due, callback)
+                self._where[key] = (level, slot)
+                return
+            span *= self.slots
+
+    def cancel(self, key: Hashable) -> bool:
+        """Drop the timer for key. Returns False if there was none."""
+        where = self._where.pop(key, None)
+        if where is None:
+            return False
+        level, slot = where
+        del self._wheels[level][slot][key]
+        return True
+
+    def advance(self, now: float) -> int:
+        """Fire every timer due by now. Returns how many fired."""
+        fired = 0
+        target = self._tick_of(now)
+        while self._current < target:
+            self._current += 1
+            # Cascade from the highest level that just turned over
+            span = 1
+            for level in range(1, self.levels):
+                span *= self.slots
+                if self._current % span:
+                    break
+                self._cascade(level, (self._current // span) % self.slots)
+            fired += self._fire(self._current % self.slots)
+        return fired
+
+    def _cascade(self, level: int, slot: int) -> None:
+        timers = self._wheels[level][slot]
+        self._wheels[level][slot] = {}
+        for key, (due, callback) in timers.items():
+            del self._where[key]
+            if due <= self._current:
+                self._wheels[0][self._current % self.slots][key] = (due, callback)
+                self._where[key] = (0, self._current % self.slots)
+            else:
+                self._insert(key, due, callback)
+
+    def _fire(self, slot: int) -> int:
+        timers = self._wheels[0][slot]
+        due_now = [(key, callback) for key, (due, callback) in timers.items() if due <= self._current]
+        for key, _ in due_now:
+            del timers[key]
+            del self._where[key]
+        for key, callback in due_now:
+            callback(key)
+        return len(due_now)
+
+    def schedule_threadsafe(self, key: Hashable, deadline: float, callback: Callable[[Hashable], None]) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.schedule, key, deadline, callback)
+
+    def cancel_threadsafe(self, key: Hashable) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.cancel, key)
+
+    async def run(self) -> None:
+        """Advance the wheel every tick until cancelled"""
+        self._loop = asyncio.get_running_loop()
+        self._current = max(self._current, self._tick_of(time.time()))
+        while True:
+            await asyncio.sleep(self.tick)
+            self.advance(time.time())
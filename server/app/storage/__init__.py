@@ -0,0 +1,35 @@
+import os
+
+from app.storage.base import (
+    GameStore, GameRecord, GameNotFoundError, VersionConflictError, affinity_shard
+)
+from app.storage.memory import InMemoryGameStore
+from app.storage.sqlite import SqliteGameStore
+from app.storage.codec import pack_game, unpack_game
+
+
+def create_store_from_env() -> GameStore:
+    """
+    Pick the game store from the environment.
+
+    CHESS_STORE=memory (default) keeps games inside one process.
+    CHESS_STORE=sqlite shares them between uvicorn workers through
+    the file named by CHESS_STORE_PATH; each worker keeps up to
+    CHESS_STORE_CACHE_GAMES decoded games.
+    """
+    backend = os.environ.get("CHESS_STORE", "memory").lower()
+    if backend == "memory":
+        return InMemoryGameStore()
+    if backend == "sqlite":
+        return SqliteGameStore(
+            os.environ.get("CHESS_STORE_PATH", "chess_games.db"),
+            cache_games=int(os.environ.get("CHESS_STORE_CACHE_GAMES", "2000")),
+        )
+    raise ValueError(f"Unknown CHESS_STORE backend: {backend}")
+
+
+__all__ = [
+    'GameStore', 'GameRecord', 'GameNotFoundError', 'VersionConflictError',
+    'affinity_shard', 'InMemoryGameStore', 'SqliteGameStore',
+    'pack_game', 'unpack_game', 'create_store_from_env'
+]
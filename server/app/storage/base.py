@@ -0,0 +1,118 @@
+import zlib
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+from app.models.game import Game
+
+
+class GameNotFoundError(KeyError):
+    """Raised when a game id is not in the store"""
+
+
+class VersionConflictError(Exception):
+    """Raised when a game changed since the version the caller expected"""
+
+    def __init__(self, game_id: str, expected: int, actual: int):
+        super().__init__(
+            f"Game {game_id} is at version {actual}, expected {expected}"
+        )
+        self.game_id = game_id
+        self.expected = expected
+        self.actual = actual
+
+
+@dataclass(frozen=True)
+class GameRecord:
+    """A snapshot of a stored game. The game must be treated as read-only."""
+    game_id: str
+    version: int
+    game: Game
+
+
+def affinity_shard(game_id: str, shard_count: int) -> int:
+    """
+    Stable shard for a game id, the same in every process.
+    Any worker can serve any game; routing a game to the same worker
+    only keeps its decoded copy warm in that worker's cache.
+    """
+    if shard_count <= 1:
+        return 0
+    return zlib.crc32(game_id.encode()) % shard_count
+
+
+class GameStore(ABC):
+    """
+    Versioned storage for games.
+
+    Every successful update bumps the version by one. Updates are
+    optimistic: the change is made on a private copy of the game and
+    published only if nobody else published a version in the meantime,
+    otherwise the change is retried on the newer game.
+    """
+
+    def __init__(self, max_retries: int = 8):
+        self.max_retries = max_retries
+
+    @abstractmethod
+    def _insert(self, game_id: str, game: Game) -> None:
+        """Add a new game at version 0"""
+
+    @abstractmethod
+    def get(self, game_id: str) -> GameRecord:
+        """Latest version of a game"""
+
+    @abstractmethod
+    def _compare_and_set(self, game_id: str, expected_version: int, game: Game) -> bool:
+        """Store game as expected_version + 1 if the stored version is still expected_version"""
+
+    @abstractmethod
+    def delete(self, game_id: str) -> None:
+        """Remove a game"""
+
+    def create(self, game: Optional[Game] = None, game_id: Optional[str] = None) -> GameRecord:
+        """Store a new game and return its record"""
+        game = game or Game()
+        game_id = game_id or uuid.uuid4().hex
+        self._insert(game_id, game)
+        return GameRecord(game_id, 0, game)
+
+    def get_or_create(self, game_id: str) -> GameRecord:
+        """Load a game, creating a fresh one under that id if needed"""
+        try:
+            return self.get(game_id)
+        except GameNotFoundError:
+            try:
+                return self.create(game_id=game_id)
+            except ValueError:
+                # Another worker created it first
+                return self.get(game_id)
+
+    def update(
+        self,
+        game_id: str,
+        mutate: Callable[[Game], bool],
+        expected_version: Optional[int] = None,
+    ) -> Tuple[bool, GameRecord]:
+        """
+        Apply mutate to a copy of the game and publish it as a new version.
+
+        mutate returns False when it did not change the game, in which case
+        nothing is written. If expected_version is given the update fails
+        with VersionConflictError instead of retrying on a newer version.
+        """
+        for _ in range(self.max_retries):
+            record = self.get(game_id)
+            if expected_version is not None and record.version != expected_version:
+                raise VersionConflictError(game_id, expected_version, record.version)
+
+            game = record.game.copy()
+            if not mutate(game):
+                return False, record
+
+            if self._compare_and_set(game_id, record.version, game):
+                return True, GameRecord(game_id, record.version + 1, game)
+
+        latest = self.get(game_id)
+        raise VersionConflictError(game_id, record.version, latest.version)
@@ -0,0 +1,166 @@
+"""
+Compact binary encoding of a Game.
+
+Layout (little endian):
+    header  - format version, starting side, status, en passant square
+              of the starting position (255 for none), move count
+    board   - 64 bytes for the starting position, one byte per square
+    moves   - 3 bytes per move: from square, to square, promotion piece
+    clock   - optional: base, increment, white and black time left,
+              side on the clock (255 for none) and when its turn started
+
+The current board and game_history are rebuilt by replaying the moves,
+which is cheap because they were already validated when first played.
+"""
+import struct
+from typing import List, Optional
+
+from app.models.board import Board
+from app.models.clock import GameClock
+from app.models.game import Game, GameStatus, Move
+from app.models.piece import (
+    Piece, PieceType, Color, King, Queen, Rook, Bishop, Knight, Pawn
+)
+from app.models.position import Position
+
+FORMAT_VERSION = 3
+
+_HEADER = struct.Struct("<BBBBH")
+_NO_SQUARE = 255
+_CLOCK = struct.Struct("<ddddBd")
+
+_PIECE_TYPES: List[PieceType] = [
+    PieceType.PAWN, PieceType.ROOK, PieceType.KNIGHT,
+    PieceType.BISHOP, PieceType.QUEEN, PieceType.KING,
+]
+_PIECE_CLASSES = {
+    PieceType.PAWN: Pawn, PieceType.ROOK: Rook, PieceType.KNIGHT: Knight,
+    PieceType.BISHOP: Bishop, PieceType.QUEEN: Queen, PieceType.KING: King,
+}
+_STATUSES: List[GameStatus] = list(GameStatus)
+
+_BLACK_BIT = 0x08
+_MOVED_BIT = 0x10
+_TYPE_MASK = 0x07
+
+
+def _encode_piece(piece: Optional[Piece]) -> int:
+    if piece is None:
+        return 0
+    code = _PIECE_TYPES.index(piece.piece_type) + 1
+    if piece.color == Color.BLACK:
+        code |= _BLACK_BIT
+    if piece.has_moved:
+        code |= _MOVED_BIT
+    return code
+
+
+def _decode_piece(code: int) -> Optional[Piece]:
+    if code == 0:
+        return None
+    piece_type = _PIECE_TYPES[(code & _TYPE_MASK) - 1]
+    color = Color.BLACK if code & _BLACK_BIT else Color.WHITE
+    return _PIECE_CLASSES[piece_type](color, has_moved=bool(code & _MOVED_BIT))
+
+
+def pack_board(board: Board) -> bytes:
+    """Encode a board as 64 bytes, row by row."""
+    return bytes(
+        _encode_piece(board.grid[r][c]) for r in range(8) for c in range(8)
+    )
+
+
+def unpack_board(data: bytes) -> Board:
+    """Decode a board produced by pack_board."""
+    if len(data) != 64:
+        raise ValueError(f"Packed board must be 64 bytes, got {len(data)}")
+    board = Board()
+    for i, code in enumerate(data):
+        board.grid[i // 8][i % 8] = _decode_piece(code)
+    return board
+
+
+def pack_game(game: Game) -> bytes:
+    """Encode a game as its starting board plus move history."""
+    start_status, start_board = game.game_history[0]
+    plies = len(game.move_history)
+    start_turn = game.current_turn if plies % 2 == 0 else game.current_turn.opposite()
+    start_move = game.start_last_move
+
+    parts = [
+        _HEADER.pack(
+            FORMAT_VERSION,
+            0 if start_turn == Color.WHITE else 1,
+            _STATUSES.index(game.status),
+            start_move.to_pos.row * 8 + start_move.to_pos.col if start_move else _NO_SQUARE,
+            plies,
+        ),
+        pack_board(start_board),
+    ]
+    moves = bytearray()
+    for move in game.move_history:
+        promotion = move.promotion_piece
+        moves.append(move.from_pos.row * 8 + move.from_pos.col)
+        moves.append(move.to_pos.row * 8 + move.to_pos.col)
+        moves.append(_PIECE_TYPES.index(promotion) + 1 if promotion else 0)
+    parts.append(bytes(moves))
+
+    clock = game.clock
+    if clock is not None:
+        running = _NO_SQUARE
+        if clock.running is not None:
+            running = 0 if clock.running == Color.WHITE else 1
+        parts.append(_CLOCK.pack(
+            clock.base, clock.increment,
+            clock.remaining[Color.WHITE], clock.remaining[Color.BLACK],
+            running, clock.turn_started or 0.0,
+        ))
+    return b"".join(parts)
+
+
+def unpack_game(data: bytes) -> Game:
+    """Rebuild a game, including its board history, from pack_game output."""
+    version, start_turn, status, start_square, plies = _HEADER.unpack_from(data, 0)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported packed game version: {version}")
+
+    offset = _HEADER.size
+    board = unpack_board(data[offset:offset + 64])
+    offset += 64
+
+    game = Game.__new__(Game)
+    game.board = board
+    game.current_turn = Color.BLACK if start_turn else Color.WHITE
+    game.move_history = []
+    game.status = GameStatus.ACTIVE
+    game.game_history = [(GameStatus.ACTIVE, board.clone())]
+    game.start_last_move = None
+    if start_square != _NO_SQUARE:
+        # The pawn that moved two squares into the starting position
+        row, col = start_square // 8, start_square % 8
+        back = 2 if row == 4 else -2
+        game.start_last_move = Move(Position(row + back, col), Position(row, col))
+
+    for _ in range(plies):
+        from_sq, to_sq, promotion = data[offset], data[offset + 1], data[offset + 2]
+        offset += 3
+        move = Move(
+            Position(from_sq // 8, from_sq % 8),
+            Position(to_sq // 8, to_sq % 8),
+            _PIECE_TYPES[promotion - 1] if promotion else None,
+        )
+        game.apply_legal_move(move)
+        game.game_history.append((GameStatus.ACTIVE, game.board.clone()))
+
+    game.clock = None
+    if len(data) >= offset + _CLOCK.size:
+        base, increment, white, black, running, turn_started = _CLOCK.unpack_from(data, offset)
+        game.clock = GameClock(
+            base, increment, {Color.WHITE: white, Color.BLACK: black},
+            None if running == _NO_SQUARE else (Color.BLACK if running else Color.WHITE),
+            turn_started if running != _NO_SQUARE else None,
+        )
+
+    game.status = _STATUSES[status]
+    game.game_history[-1] = (game.status, game.game_history[-1][1])
+    return game
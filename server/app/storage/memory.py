@@ -0,0 +1,39 @@
+import threading
+from typing import Dict, Tuple
+
+from app.models.game import Game
+from app.storage.base import GameStore, GameRecord, GameNotFoundError
+
+
+class InMemoryGameStore(GameStore):
+    """Keeps games in this process only. Suitable for a single worker."""
+
+    def __init__(self, max_retries: int = 8):
+        super().__init__(max_retries)
+        self._games: Dict[str, Tuple[int, Game]] = {}
+        self._lock = threading.Lock()
+
+    def _insert(self, game_id: str, game: Game) -> None:
+        with self._lock:
+            if game_id in self._games:
+                raise ValueError(f"Game {game_id} already exists")
+            self._games[game_id] = (0, game)
+
+    def get(self, game_id: str) -> GameRecord:
+        try:
+            version, game = self._games[game_id]
+        except KeyError:
+            raise GameNotFoundError(game_id) from None
+        return GameRecord(game_id, version, game)
+
+    def _compare_and_set(self, game_id: str, expected_version: int, game: Game) -> bool:
+        with self._lock:
+            version, _ = self._games[game_id]
+            if version != expected_version:
+                return False
+            self._games[game_id] = (version + 1, game)
+            return True
+
+    def delete(self, game_id: str) -> None:
+        with self._lock:
+            self._games.pop(game_id, None)
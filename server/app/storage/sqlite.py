@@ -0,0 +1,104 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+from app.models.game import Game
+from app.storage.base import GameStore, GameRecord, GameNotFoundError
+from app.storage.codec import pack_game, unpack_game
+
+
+class SqliteGameStore(GameStore):
+    """
+    Shares games between worker processes through a local SQLite file.
+
+    Each row holds the packed game and its version; writers use
+    UPDATE ... WHERE version = ? as the compare-and-set. Every process
+    keeps the last decoded copy of up to cache_games recently used games
+    and only decodes again when another process published a newer version.
+    """
+
+    def __init__(self, path: str, max_retries: int = 8, timeout: float = 5.0, cache_games: int = 2_000):
+        super().__init__(max_retries)
+        self.path = path
+        self.timeout = timeout
+        self.cache_games = cache_games
+        self._local = threading.local()
+        self._cache: "OrderedDict[str, Tuple[int, Game]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS games ("
+            " id TEXT PRIMARY KEY,"
+            " version INTEGER NOT NULL,"
+            " data BLOB NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, game_id: str, version: int, game: Game) -> None:
+        with self._cache_lock:
+            cached = self._cache.get(game_id)
+            if cached is None or cached[0] < version:
+                self._cache[game_id] = (version, game)
+            self._cache.move_to_end(game_id)
+            while len(self._cache) > self.cache_games:
+                self._cache.popitem(last=False)
+
+    def _insert(self, game_id: str, game: Game) -> None:
+        try:
+            self._connection().execute(
+                "INSERT INTO games (id, version, data) VALUES (?, 0, ?)",
+                (game_id, pack_game(game)),
+            )
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Game {game_id} already exists") from None
+        self._remember(game_id, 0, game)
+
+    def get(self, game_id: str) -> GameRecord:
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT version FROM games WHERE id = ?", (game_id,)
+        ).fetchone()
+        if row is None:
+            raise GameNotFoundError(game_id)
+
+        with self._cache_lock:
+            cached = self._cache.get(game_id)
+            if cached is not None and cached[0] == row[0]:
+                self._cache.move_to_end(game_id)
+                return GameRecord(game_id, cached[0], cached[1])
+
+        row = conn.execute(
+            "SELECT version, data FROM games WHERE id = ?", (game_id,)
+        ).fetchone()
+        if row is None:
+            raise GameNotFoundError(game_id)
+        version, data = row
+        game = unpack_game(data)
+        self._remember(game_id, version, game)
+        return GameRecord(game_id, version, game)
+
+    def _compare_and_set(self, game_id: str, expected_version: int, game: Game) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE games SET version = ?, data = ? WHERE id = ? AND version = ?",
+            (expected_version + 1, pack_game(game), game_id, expected_version),
+        )
+        if cursor.rowcount != 1:
+            return False
+        self._remember(game_id, expected_version + 1, game)
+        return True
+
+    def delete(self, game_id: str) -> None:
+        self._connection().execute("DELETE FROM games WHERE id = ?", (game_id,))
+        with self._cache_lock:
+            self._cache.pop(game_id, None)
@@ -0,0 +1,284 @@
+"""
+Export positions from PGN archives as chunked columnar NumPy files.
+
+Every position reached in a game (before each move) becomes one row:
+
+    planes  uint8  (N, 12, 8)   piece bitplanes, one byte per board row,
+                                bit 7 = column a; planes are white
+                                P N B R Q K then black P N B R Q K;
+                                row 0 is rank 8
+    side    int8   (N,)         side to move, 0 white, 1 black
+    legal   uint8  (N, 512)     packed 64x64 from/to mask of legal moves,
+                                bit index from_square * 64 + to_square
+    result  int8   (N,)         game result for white: 1, 0 or -1
+    hash    uint64 (N,)         Zobrist hash of the position
+
+Rows are written in chunks of --chunk-size, each column to its own .npy
+file so chunks can be opened with np.load(path, mmap_mode="r") without
+copying. --format npz writes one compressed .npz per chunk instead, which
+is smaller but cannot be memory-mapped. A manifest.json lists all chunks.
+
+The PGN files are cut into --workers contiguous byte ranges on game
+boundaries, found by a quick scan of the raw bytes, so every game is parsed
+by exactly one worker. Each worker keeps at most one chunk in memory.
+A game's rows are only written once the whole game has replayed, so a game
+with a bad move contributes nothing. With --dedup, positions already
+written by the same worker are skipped; the set of seen hashes is capped
+by --dedup-capacity and started afresh when full.
+
+    python -m scripts.export_positions games/*.pgn --out dataset --workers 8 --dedup
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from app.models.game import Game
+from app.models.pgn import read_pgn, san_to_move
+from app.models.piece import Color, PieceType
+from app.models.zobrist import zobrist_hash
+
+COLUMNS = ("planes", "side", "legal", "result", "hash")
+RESULTS = {"1-0": 1, "0-1": -1, "1/2-1/2": 0}
+
+_PLANE_ORDER = [
+    PieceType.PAWN, PieceType.KNIGHT, PieceType.BISHOP,
+    PieceType.ROOK, PieceType.QUEEN, PieceType.KING,
+]
+
+
+class ChunkWriter:
+    """Buffers rows in preallocated arrays and writes them out chunk by chunk"""
+
+    def __init__(self, out_dir: str, prefix: str, chunk_size: int, fmt: str):
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.fmt = fmt
+        self.chunks: List[Dict] = []
+        self.rows = 0
+        self._arrays = {
+            "planes": np.zeros((chunk_size, 12, 8), dtype=np.uint8),
+            "side": np.zeros(chunk_size, dtype=np.int8),
+            "legal": np.zeros((chunk_size, 512), dtype=np.uint8),
+            "result": np.zeros(chunk_size, dtype=np.int8),
+            "hash": np.zeros(chunk_size, dtype=np.uint64),
+        }
+        self._bits = np.zeros((12, 64), dtype=np.uint8)
+        self._legal_bits = np.zeros(4096, dtype=np.uint8)
+
+    def encode(self, game: Game) -> Tuple["np.ndarray", "np.ndarray", int]:
+        """Packed planes, packed legal-move mask and side to move of a position"""
+        bits = self._bits
+        bits.fill(0)
+        grid = game.board.grid
+        for sq in range(64):
+            piece = grid[sq // 8][sq % 8]
+            if piece is not None:
+                plane = _PLANE_ORDER.index(piece.piece_type)
+                if piece.color == Color.BLACK:
+                    plane += 6
+                bits[plane, sq] = 1
+        planes = np.packbits(bits, axis=1)
+
+        legal = self._legal_bits
+        legal.fill(0)
+        for move in game.get_all_legal_moves():
+            legal[(move.from_pos.row * 8 + move.from_pos.col) * 64
+                  + move.to_pos.row * 8 + move.to_pos.col] = 1
+        return planes, np.packbits(legal), 0 if game.current_turn == Color.WHITE else 1
+
+    def add(self, row: Tuple["np.ndarray", "np.ndarray", int], result: int, position_hash: int) -> None:
+        """Append a row made by encode()"""
+        i = self.rows
+        self._arrays["planes"][i], self._arrays["legal"][i], self._arrays["side"][i] = row
+        self._arrays["result"][i] = result
+        self._arrays["hash"][i] = position_hash
+
+        self.rows += 1
+        if self.rows == self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.rows == 0:
+            return
+        name = f"{self.prefix}-{len(self.chunks):05d}"
+        data = {column: self._arrays[column][:self.rows] for column in COLUMNS}
+        if self.fmt == "npz":
+            files = [f"{name}.npz"]
+            np.savez_compressed(os.path.join(self.out_dir, files[0]), **data)
+        else:
+            files = []
+            for column, array in data.items():
+                files.append(f"{name}.{column}.npy")
+                np.save(os.path.join(self.out_dir, files[-1]), array)
+        self.chunks.append({"name": name, "rows": self.rows, "files": files})
+        self.rows = 0
+
+
+def game_offsets(path: str) -> List[int]:
+    """
+    Byte offsets where games start, by the same rule as read_pgn: the
+    first tag line of the file and every tag line that follows movetext.
+    """
+    offsets = []
+    offset = 0
+    after_movetext = True
+    with open(path, "rb") as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped.startswith(b"["):
+                if after_movetext:
+                    offsets.append(offset)
+                    after_movetext = False
+            elif stripped:
+                after_movetext = True
+            offset += len(line)
+    return offsets
+
+
+def split_ranges(paths: List[str], parts: int) -> List[List[Tuple[str, int, int]]]:
+    """Cut the files into parts lists of (path, start, end) byte ranges of roughly equal size"""
+    sizes = [os.path.getsize(path) for path in paths]
+    total = sum(sizes)
+    ranges: List[List[Tuple[str, int, int]]] = [[] for _ in range(parts)]
+    part, before = 0, 0  # before: bytes in the files already handled
+    for path, size in zip(paths, sizes):
+        offsets = game_offsets(path)
+        if offsets:
+            start = offsets[0]
+            for offset in offsets[1:]:
+                # Cut at the first game boundary past this part's share
+                if part < parts - 1 and before + offset >= total * (part + 1) / parts:
+                    ranges[part].append((path, start, offset))
+                    part += 1
+                    start = offset
+            ranges[part].append((path, start, size))
+        before += size
+    return ranges
+
+
+def _range_lines(path: str, start: int, end: int) -> Iterator[str]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            if offset >= end:
+                break
+            offset += len(line)
+            yield line.decode("utf-8", errors="replace")
+
+
+def export_shard(
+    ranges: List[Tuple[str, int, int]],
+    part: int,
+    out_dir: str,
+    chunk_size: int,
+    fmt: str,
+    dedup_capacity: Optional[int],
+) -> Dict:
+    """Replay every game in the given byte ranges"""
+    writer = ChunkWriter(out_dir, f"part{part:03d}", chunk_size, fmt)
+    seen: Set[int] = set()
+    stats = {"games": 0, "skipped_games": 0, "positions": 0, "duplicates": 0}
+
+    for path, start, end in ranges:
+        for index, pgn in enumerate(read_pgn(_range_lines(path, start, end)), 1):
+            result = RESULTS.get(pgn.result)
+            if result is None:
+                stats["skipped_games"] += 1
+                continue
+            rows = []
+            hashes: Set[int] = set()
+            duplicates = 0
+            try:
+                fen = pgn.headers.get("FEN")
+                game = Game.from_fen(fen) if fen else Game()
+                for san in pgn.moves:
+                    position_hash = zobrist_hash(game)
+                    if dedup_capacity is not None and (position_hash in seen or position_hash in hashes):
+                        duplicates += 1
+                    else:
+                        hashes.add(position_hash)
+                        rows.append((writer.encode(game), position_hash))
+                    move = san_to_move(game, san)
+                    game.make_move(move.from_pos, move.to_pos, move.promotion_piece)
+            except (ValueError, IndexError) as e:
+                print(f"{path}: game {index} of bytes {start}-{end}: {e}", file=sys.stderr)
+                stats["skipped_games"] += 1
+                continue
+
+            if dedup_capacity is not None:
+                if len(seen) + len(hashes) > dedup_capacity:
+                    seen.clear()
+                seen.update(hashes)
+            for row, position_hash in rows:
+                writer.add(row, result, position_hash)
+            stats["positions"] += len(rows)
+            stats["duplicates"] += duplicates
+            stats["games"] += 1
+
+    writer.flush()
+    stats["chunks"] = writer.chunks
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export PGN positions as NumPy shards")
+    parser.add_argument("pgn", nargs="+", help="PGN files to read")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=65536, help="positions per chunk")
+    parser.add_argument("--format", choices=("npy", "npz"), default="npy")
+    parser.add_argument("--dedup", action="store_true", help="skip positions already exported")
+    parser.add_argument("--dedup-capacity", type=int, default=5_000_000,
+                        help="hashes remembered per worker for --dedup")
+    args = parser.parse_args()
+
+    if np is None:
+        raise SystemExit("numpy is required for exporting: pip install numpy")
+    os.makedirs(args.out, exist_ok=True)
+
+    dedup_capacity = args.dedup_capacity if args.dedup else None
+    shard_args = [
+        (ranges, part, args.out, args.chunk_size, args.format, dedup_capacity)
+        for part, ranges in enumerate(split_ranges(args.pgn, args.workers))
+    ]
+    if args.workers == 1:
+        shards = [export_shard(*shard_args[0])]
+    else:
+        from multiprocessing import Pool
+        with Pool(args.workers) as pool:
+            shards = pool.starmap(export_shard, shard_args)
+
+    manifest = {
+        "format": args.format,
+        "columns": {
+            "planes": {"dtype": "uint8", "shape": [12, 8]},
+            "side": {"dtype": "int8", "shape": []},
+            "legal": {"dtype": "uint8", "shape": [512]},
+            "result": {"dtype": "int8", "shape": []},
+            "hash": {"dtype": "uint64", "shape": []},
+        },
+        "sources": args.pgn,
+        "dedup": args.dedup,
+        "games": sum(shard["games"] for shard in shards),
+        "skipped_games": sum(shard["skipped_games"] for shard in shards),
+        "positions": sum(shard["positions"] for shard in shards),
+        "duplicates": sum(shard["duplicates"] for shard in shards),
+        "chunks": [chunk for shard in shards for chunk in shard["chunks"]],
+    }
+    with open(os.path.join(args.out, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Wrote {manifest['positions']} positions from {manifest['games']} games "
+          f"in {len(manifest['chunks'])} chunks to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Load test for the FastAPI app with many simulated concurrent games.
+
+Every simulated game creates a game on the server and then posts moves
+for both sides, either random legal moves or moves replayed from a PGN
+file. Move sequences are prepared before the clock starts, so the client
+spends no time on move generation while the server is measured.
+
+    python -m scripts.load_test --games 2000 --concurrency 200
+    python -m scripts.load_test --url http://localhost:8000 --pgn games.pgn
+    python -m scripts.load_test --output results/$(git rev-parse --short HEAD).json
+
+Without --url the app is driven in-process through httpx's ASGI
+transport. There --measure-memory replays the games a second time, untimed
+and under tracemalloc, to measure memory per live game; tracemalloc slows
+the server down several times, so it is never on while the clock runs.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import random
+import subprocess
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.models.game import Game, GameStatus, Move
+from app.models.pgn import read_pgn, san_to_move
+
+
+def random_game(rng: random.Random, max_plies: int) -> List[Move]:
+    """A random sequence of legal moves"""
+    game = Game()
+    moves = []
+    while len(moves) < max_plies and game.status == GameStatus.ACTIVE:
+        move = rng.choice(game.get_all_legal_moves())
+        game.make_move(move.from_pos, move.to_pos, move.promotion_piece)
+        moves.append(move)
+    return moves
+
+
+def pgn_games(path: str, max_plies: int) -> List[List[Move]]:
+    """Move sequences from a PGN file; games from custom positions are skipped"""
+    sequences = []
+    with open(path) as f:
+        for pgn in read_pgn(f):
+            if "FEN" in pgn.headers:
+                continue
+            game = Game()
+            moves = []
+            for san in pgn.moves[:max_plies]:
+                move = san_to_move(game, san)
+                game.make_move(move.from_pos, move.to_pos, move.promotion_piece)
+                moves.append(move)
+            sequences.append(moves)
+    return sequences
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """Resident set size of a process, Linux only"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, concurrency: int, think_time: float):
+        self.client = client
+        self.think_time = think_time
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.game_ids: List[str] = []
+
+    async def request(self, endpoint: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        async with self.semaphore:
+            start = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.HTTPError:
+                self.errors[endpoint] += 1
+                return None
+            self.latencies[endpoint].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[endpoint] += 1
+        return response
+
+    async def play(self, moves: List[Move]) -> None:
+        response = await self.request("POST /games", "POST", "/games")
+        if response is None or response.status_code != 200:
+            return
+        game_id = response.json()["game_id"]
+        self.game_ids.append(game_id)
+
+        for move in moves:
+            if self.think_time:
+                await asyncio.sleep(random.uniform(0, 2 * self.think_time))
+            body = {
+                "from_pos": {"row": move.from_pos.row, "col": move.from_pos.col},
+                "to_pos": {"row": move.to_pos.row, "col": move.to_pos.col},
+                "promotion_piece": move.promotion_piece.value if move.promotion_piece else None,
+            }
+            response = await self.request(
+                "POST /games/{id}/move", "POST", f"/games/{game_id}/move", json=body
+            )
+            if response is None or response.status_code != 200:
+                return
+
+    def report(self, duration: float) -> dict:
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            endpoints[endpoint] = {
+                "count": len(values),
+                "errors": self.errors.get(endpoint, 0),
+                "throughput_rps": round(len(values) / duration, 2),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+                "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+            }
+        total = sum(len(values) for values in self.latencies.values())
+        return {
+            "duration_s": round(duration, 3),
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "throughput_rps": round(total / duration, 2),
+            "endpoints": endpoints,
+        }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def play_all(test: LoadTest, sequences: List[List[Move]], games: int) -> None:
+    async with test.client:
+        await asyncio.gather(*(
+            test.play(sequences[i % len(sequences)]) for i in range(games)
+        ))
+
+
+async def run(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    if args.pgn:
+        sequences = pgn_games(args.pgn, args.plies)
+        if not sequences:
+            raise SystemExit(f"No usable games in {args.pgn}")
+    else:
+        sequences = [random_game(rng, args.plies) for _ in range(args.distinct)]
+    print(f"Prepared {len(sequences)} move sequences")
+
+    # One log line per request would dominate the measurement
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    store = None
+    rss_before = None
+    if args.url:
+        if args.server_pid:
+            rss_before = rss_bytes(args.server_pid)
+    else:
+        import app.main
+        logging.getLogger("chess").setLevel(logging.WARNING)
+        store = app.main.store
+
+    def make_client() -> httpx.AsyncClient:
+        if args.url:
+            return httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app.main.app),
+            base_url="http://loadtest",
+            timeout=args.timeout,
+        )
+
+    test = LoadTest(make_client(), args.concurrency, args.think_time)
+    start = time.perf_counter()
+    await play_all(test, sequences, args.games)
+    duration = time.perf_counter() - start
+    results = test.report(duration)
+
+    memory_per_game = None
+    if store is not None and args.measure_memory:
+        for game_id in test.game_ids:
+            store.delete(game_id)
+        gc.collect()
+        tracemalloc.start()
+        replay = LoadTest(make_client(), args.concurrency, 0.0)
+        await play_all(replay, sequences, args.games)
+        if replay.game_ids:
+            # Memory released by deleting every game is what the games held
+            gc.collect()
+            with_games = tracemalloc.get_traced_memory()[0]
+            for game_id in replay.game_ids:
+                store.delete(game_id)
+            gc.collect()
+            without_games = tracemalloc.get_traced_memory()[0]
+            memory_per_game = (with_games - without_games) // len(replay.game_ids)
+        tracemalloc.stop()
+    elif rss_before is not None and test.game_ids:
+        rss_after = rss_bytes(args.server_pid)
+        if rss_after is not None:
+            memory_per_game = (rss_after - rss_before) // len(test.game_ids)
+
+    results["memory_per_game_bytes"] = memory_per_game
+    results["config"] = {
+        "target": args.url or "in-process",
+        "games": args.games,
+        "concurrency": args.concurrency,
+        "plies": args.plies,
+        "source": args.pgn or f"random ({args.distinct} sequences, seed {args.seed})",
+        "think_time_s": args.think_time,
+        "store": os.environ.get("CHESS_STORE", "memory"),
+    }
+    results["commit"] = git_commit()
+    results["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the chess server")
+    parser.add_argument("--url", help="server to test, e.g. http://localhost:8000 (default: in-process)")
+    parser.add_argument("--games", type=int, default=1000, help="simulated games")
+    parser.add_argument("--concurrency", type=int, default=100, help="requests in flight at once")
+    parser.add_argument("--plies", type=int, default=40, help="moves per game, both sides counted")
+    parser.add_argument("--pgn", help="replay games from this PGN file instead of random moves")
+    parser.add_argument("--distinct", type=int, default=50, help="distinct random games to prepare")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean seconds between moves of a game")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--measure-memory", action="store_true",
+                        help="in-process only: replay the games untimed under tracemalloc to measure memory per game")
+    parser.add_argument("--server-pid", type=int, help="pid of a --url server, to estimate memory per game from its RSS")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Self-play SPRT match between two engine configurations.
+
+Engines are given as comma-separated key=value settings of
+app.engine.match.EngineConfig: name, depth, nodes, movetime, tt_size and
+searcher (module:Class, so a patched copy of the Searcher can be tested
+against the current one). Games are played in pairs with colours swapped
+from an opening suite, which is either built in, a file with one FEN per
+line, or a PGN file cut off after --book-plies.
+
+The engines are deterministic, so replaying an opening would only repeat
+earlier games. Each pair therefore starts from its opening followed by
+--random-plies random moves (seeded by --seed and the pair number, so runs
+are reproducible). With --random-plies 0 every opening is played once and
+the match ends after at most twice as many games as there are openings.
+
+    python -m scripts.selfplay --base name=base,nodes=20000 --test name=tt18,nodes=20000,tt_size=262144
+    python -m scripts.selfplay --base name=d2,depth=2 --test name=d3,depth=3 --elo0 0 --elo1 50
+    python -m scripts.selfplay --openings book.pgn --output results/$(git rev-parse --short HEAD).json
+
+Prints progress to stderr and a JSON summary (games, W/D/L, Elo with its
+95% error margin, SPRT state and nodes per second of both engines) to
+stdout or --output.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from typing import List
+
+from app.engine.match import EngineConfig, GameResult, MatchResult, run_match
+from app.models.game import Game, Move
+from app.models.pgn import read_pgn, san_to_move
+
+# Short, varied openings in UCI moves, so deterministic engines do not
+# repeat the same game
+BUILTIN_OPENINGS = [
+    "e2e4 e7e5 g1f3 b8c6 f1b5",
+    "e2e4 e7e5 g1f3 b8c6 f1c4 f8c5",
+    "e2e4 c7c5 g1f3 d7d6 d2d4 c5d4",
+    "e2e4 c7c5 b1c3 b8c6 g2g3",
+    "e2e4 e7e6 d2d4 d7d5 b1c3",
+    "e2e4 c7c6 d2d4 d7d5 e4e5",
+    "e2e4 d7d5 e4d5 d8d5 b1c3",
+    "e2e4 g8f6 e4e5 f6d5 d2d4",
+    "d2d4 d7d5 c2c4 e7e6 b1c3 g8f6",
+    "d2d4 d7d5 c2c4 c7c6 g1f3 g8f6",
+    "d2d4 d7d5 c2c4 d5c4 g1f3",
+    "d2d4 g8f6 c2c4 g7g6 b1c3 f8g7",
+    "d2d4 g8f6 c2c4 e7e6 b1c3 f8b4",
+    "d2d4 f7f5 g2g3 g8f6 f1g2",
+    "c2c4 e7e5 b1c3 g8f6 g2g3",
+    "c2c4 c7c5 g1f3 b8c6 b1c3",
+    "g1f3 d7d5 g2g3 g8f6 f1g2",
+    "g1f3 g8f6 c2c4 b7b6 g2g3",
+    "e2e4 e7e5 f2f4 e5f4 g1f3",
+    "e2e4 e7e5 d2d4 e5d4 d1d4 b8c6",
+]
+
+
+def line_to_fen(line: str) -> str:
+    game = Game()
+    for uci in line.split():
+        move = Move.from_uci(uci)
+        if not game.make_move(move.from_pos, move.to_pos, move.promotion_piece):
+            raise ValueError(f"Illegal opening move {uci} in: {line}")
+    return game.to_fen()
+
+
+def load_openings(path: str, book_plies: int) -> List[str]:
+    """FENs from a file with one FEN per line, or from a PGN file"""
+    with open(path) as f:
+        if not path.lower().endswith(".pgn"):
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        fens = []
+        for pgn in read_pgn(f):
+            game = Game.from_fen(pgn.headers["FEN"]) if "FEN" in pgn.headers else Game()
+            for san in pgn.moves[:book_plies]:
+                move = san_to_move(game, san)
+                game.make_move(move.from_pos, move.to_pos, move.promotion_piece)
+            fens.append(game.to_fen())
+        return fens
+
+
+def parse_engine(text: str) -> EngineConfig:
+    fields = dict(item.split("=", 1) for item in text.split(",") if item)
+    if "name" not in fields:
+        raise argparse.ArgumentTypeError("engine needs a name=...")
+    converters = {"depth": int, "nodes": int, "movetime": float, "tt_size": int}
+    try:
+        return EngineConfig(**{key: converters.get(key, str)(value) for key, value in fields.items()})
+    except (TypeError, ValueError) as e:
+        raise argparse.ArgumentTypeError(f"bad engine {text!r}: {e}")
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def report_progress(result: MatchResult, game: GameResult) -> None:
+    state = result.sprt()
+    print(
+        f"game {len(result.games)}: {game.score} ({game.reason}, {len(game.moves)} plies)  "
+        f"+{result.wins} ={result.draws} -{result.losses}  "
+        f"LLR {state.llr:.2f} [{state.lower:.2f}, {state.upper:.2f}]",
+        file=sys.stderr, flush=True,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Self-play SPRT match between two engine configurations")
+    parser.add_argument("--base", type=parse_engine, required=True, help="reference engine, e.g. name=base,nodes=20000")
+    parser.add_argument("--test", type=parse_engine, required=True, help="engine under test, same format")
+    parser.add_argument("--openings", help="FEN-per-line or .pgn opening file (default: built-in suite)")
+    parser.add_argument("--book-plies", type=int, default=8, help="plies to take from each PGN game")
+    parser.add_argument("--games", type=int, default=1000, help="stop after this many games without a decision")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-plies", type=int, default=200, help="adjudicate a draw after this many plies")
+    parser.add_argument("--random-plies", type=int, default=4,
+                        help="random moves after each opening, so no game pair repeats (0: use each opening once)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random opening moves")
+    parser.add_argument("--elo0", type=float, default=0.0, help="SPRT null hypothesis Elo")
+    parser.add_argument("--elo1", type=float, default=5.0, help="SPRT alternative hypothesis Elo")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--games-log", action="store_true", help="include every game's moves in the JSON")
+    parser.add_argument("--output", help="write the JSON summary here instead of stdout")
+    args = parser.parse_args()
+
+    if args.openings:
+        openings = load_openings(args.openings, args.book_plies)
+    else:
+        openings = [line_to_fen(line) for line in BUILTIN_OPENINGS]
+
+    result = run_match(
+        args.base, args.test, openings,
+        max_games=args.games, workers=args.workers, max_plies=args.max_plies,
+        elo0=args.elo0, elo1=args.elo1, alpha=args.alpha, beta=args.beta,
+        random_plies=args.random_plies, seed=args.seed, on_game=report_progress,
+    )
+    summary = {
+        "revision": git_revision(),
+        "openings": len(openings),
+        "random_plies": args.random_plies,
+        "seed": args.seed,
+        **result.to_dict(args.games_log),
+    }
+
+    text = json.dumps(summary, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
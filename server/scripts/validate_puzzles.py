@@ -0,0 +1,34 @@
+"""
+Check puzzles for forced mates in parallel.
+
+Reads one FEN per line (blank lines and lines starting with # are
+skipped) and prints one JSON result per line with the status, the
+shortest mate and its main line, and the nodes searched.
+
+    python -m scripts.validate_puzzles puzzles.txt --moves 3 --workers 8 > results.jsonl
+"""
+import argparse
+import json
+import sys
+
+from app.engine.mate import solve_many
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Validate mate-in-N puzzles")
+    parser.add_argument("path", help="file with one FEN per line, - for stdin")
+    parser.add_argument("--moves", type=int, default=3, help="longest mate to look for")
+    parser.add_argument("--max-nodes", type=int, default=200_000, help="node budget per puzzle")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.path == "-" else open(args.path)
+    with source:
+        fens = [line.strip() for line in source if line.strip() and not line.startswith("#")]
+
+    for result in solve_many(fens, args.moves, args.max_nodes, args.workers):
+        print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()